@@ -0,0 +1,203 @@
+# bench/automod_bench.py
+#
+# Offline throughput benchmark for AutoModCog.on_message.
+#
+#   python -m bench.automod_bench --messages 20000 --words 100,1000,10000 --spam 0,0.1
+#   python -m bench.automod_bench --replay stream.jsonl
+#
+# A replay file holds one JSON object per line: {"author": <any id>, "content": "..."}.
+
+import argparse
+import asyncio
+import json
+import random
+import string
+import time
+import tracemalloc
+from typing import Iterable, Optional
+
+import cogs.automod
+from bench.fakes import FakeBot, FakeGuild, FakeHTTP, FakeMember, FakeMessage
+from cogs.automod import AutoModCog
+
+VOCAB = [
+    "hello", "there", "anyone", "playing", "tonight", "server", "update", "patch",
+    "notes", "raid", "boss", "loot", "gg", "thanks", "lol", "what", "time", "is",
+    "the", "event", "voice", "chat", "link", "check", "this", "out", "nice", "build",
+]
+
+
+class VirtualClock:
+    """
+    Stand-in for the `time` module inside cogs.automod. Messages are replayed
+    far faster than real time, so the rate-based rules (spam, duplicates)
+    read this clock instead, advanced by 1/rate per message.
+    """
+
+    def __init__(self, start: float):
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def make_words(n: int, rng: random.Random) -> list[str]:
+    return ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 10))) for _ in range(n)]
+
+
+def synthetic_stream(
+    n: int,
+    words: list[str],
+    spam_ratio: float,
+    rng: random.Random,
+    users: int = 500,
+    badword_ratio: float = 0.01,
+) -> list[tuple[int, str]]:
+    """(author index, content) pairs; spam comes from a handful of users in bursts."""
+    spammers = max(1, users // 100)
+    stream = []
+    for _ in range(n):
+        if rng.random() < spam_ratio:
+            author = rng.randrange(spammers)
+            content = "JOIN NOW free stuff " + " ".join(rng.choices(VOCAB, k=6))
+        else:
+            author = rng.randrange(spammers, users)
+            content = " ".join(rng.choices(VOCAB, k=rng.randint(3, 25)))
+            if words and rng.random() < badword_ratio:
+                content += " " + rng.choice(words)
+        stream.append((author, content))
+    return stream
+
+
+def replay_stream(path: str) -> list[tuple[int, str]]:
+    authors: dict = {}
+    stream = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            idx = authors.setdefault(row.get("author"), len(authors))
+            stream.append((idx, row.get("content", "")))
+    return stream
+
+
+async def run_case(
+    stream: list[tuple[int, str]],
+    words: list[str],
+    trace_memory: bool,
+    rate: float,
+) -> dict:
+    http = FakeHTTP()
+    bot = FakeBot(http)
+    guild = FakeGuild(http)
+    bot.guilds.append(guild)
+    channel = guild.text_channels[0]
+    authors = [FakeMember(guild, f"user{i}", http) for i in range(max(a for a, _ in stream) + 1)]
+
+    cog = AutoModCog(bot)  # type: ignore[arg-type]
+    cog.word_filters.guilds.override(guild.id, words)
+    messages = [FakeMessage(guild, authors[a], channel, content) for a, content in stream]
+
+    clock = VirtualClock(time.time())
+    step = 1.0 / rate if rate > 0 else 0.0
+    cogs.automod.time = clock  # type: ignore[assignment]
+
+    latencies: list[float] = []
+    if trace_memory:
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+
+    started = time.perf_counter()
+    for i, msg in enumerate(messages):
+        clock.now += step
+        t0 = time.perf_counter()
+        await cog.on_message(msg)  # type: ignore[arg-type]
+        latencies.append(time.perf_counter() - t0)
+        if i % 200 == 0:
+            # let background log-sink tasks run, outside the timed section
+            t1 = time.perf_counter()
+            await asyncio.sleep(0)
+            started += time.perf_counter() - t1
+    elapsed = time.perf_counter() - started
+
+    mem = {}
+    if trace_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        mem = {"retained_kib": (current - base) / 1024, "peak_kib": (peak - base) / 1024}
+
+    cogs.automod.time = time
+    await cog.cog_unload()
+    latencies.sort()
+    return {
+        "messages": len(messages),
+        "msgs_per_s": len(messages) / elapsed if elapsed else 0.0,
+        "p50_us": percentile(latencies, 50) * 1e6,
+        "p99_us": percentile(latencies, 99) * 1e6,
+        "actions": len(bot.modlog.rows),
+        "api_calls": http.total,
+        "rules": cog.rules.report(),
+        **mem,
+    }
+
+
+def parse_list(value: str, cast) -> list:
+    return [cast(v) for v in value.split(",") if v.strip()]
+
+
+async def main(argv: Optional[Iterable[str]] = None):
+    parser = argparse.ArgumentParser(description="AutoModCog.on_message benchmark")
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--words", default="100,1000,10000", help="word-list sizes")
+    parser.add_argument("--spam", default="0,0.1", help="spam ratios")
+    parser.add_argument("--replay", help="JSONL message stream to replay instead")
+    parser.add_argument("--rate", type=float, default=100.0, help="simulated msgs/s (0 = all at once)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc pass")
+    parser.add_argument("--rules", action="store_true", help="print per-rule timings")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    rng = random.Random(args.seed)
+    print(
+        f"{'words':>7} {'spam':>5} {'msgs/s':>10} {'p50 µs':>8} {'p99 µs':>8} "
+        f"{'actions':>8} {'api':>6} {'peak KiB':>9} {'kept KiB':>9}"
+    )
+    for size in parse_list(args.words, int):
+        words = make_words(size, rng)
+        for spam in parse_list(args.spam, float):
+            if args.replay:
+                stream = replay_stream(args.replay)
+            else:
+                stream = synthetic_stream(args.messages, words, spam, rng)
+            timing = await run_case(stream, words, trace_memory=False, rate=args.rate)
+            mem = {} if args.no_memory else await run_case(stream, words, trace_memory=True, rate=args.rate)
+            print(
+                f"{size:>7} {spam:>5.2f} {timing['msgs_per_s']:>10.0f} "
+                f"{timing['p50_us']:>8.1f} {timing['p99_us']:>8.1f} "
+                f"{timing['actions']:>8} {timing['api_calls']:>6} "
+                f"{mem.get('peak_kib', 0):>9.0f} {mem.get('retained_kib', 0):>9.0f}"
+            )
+            if args.rules:
+                for line in timing["rules"]:
+                    print(f"{'':>14}{line}")
+            if args.replay:
+                break
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
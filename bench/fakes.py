@@ -0,0 +1,336 @@
+# bench/fakes.py
+#
+# Lightweight stand-ins for discord.py objects so cogs can be driven
+# offline. Every Discord API call goes through FakeHTTP, which counts it
+# and can optionally add network latency and model rate limits / 429s.
+
+import asyncio
+import itertools
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+import discord
+
+from utils.permissions import PermissionService
+
+_ids = itertools.count(10_000)
+
+
+def next_id() -> int:
+    return next(_ids)
+
+
+class _Bucket:
+    """Fixed-window rate limit bucket, serialised like discord.py's per-bucket lock."""
+
+    __slots__ = ("limit", "per", "remaining", "reset_at", "lock", "waiting")
+
+    def __init__(self, limit: int, per: float):
+        self.limit = limit
+        self.per = per
+        self.remaining = limit
+        self.reset_at = 0.0
+        self.lock = asyncio.Lock()
+        self.waiting = 0
+
+
+class FakeHTTP:
+    """
+    Counts every API call by route. With `limits` ({route: (limit, per)})
+    and/or `global_limit` set, calls also go through per-(route, major id)
+    buckets: a call that finds its bucket empty is answered with a 429 and
+    sleeps out retry_after before going through, as discord.py does.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        limits: Optional[Dict[str, Tuple[int, float]]] = None,
+        global_limit: Optional[Tuple[int, float]] = None,
+    ):
+        self.latency = latency
+        self.limits = limits or {}
+        self.calls: Counter = Counter()
+        self.ratelimited: Counter = Counter()
+        self.retry_wait = 0.0
+        self._buckets: Dict[tuple, _Bucket] = {}
+        self._global = _Bucket(*global_limit) if global_limit else None
+
+    async def _take(self, bucket: _Bucket, route: str):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if now >= bucket.reset_at:
+            bucket.remaining = bucket.limit
+            bucket.reset_at = now + bucket.per
+        if bucket.remaining <= 0:
+            retry_after = bucket.reset_at - now
+            self.ratelimited[route] += 1
+            self.retry_wait += retry_after
+            await asyncio.sleep(retry_after)
+            bucket.remaining = bucket.limit
+            bucket.reset_at = loop.time() + bucket.per
+        bucket.remaining -= 1
+
+    async def request(self, route: str, major: Optional[int] = None):
+        self.calls[route] += 1
+        limit = self.limits.get(route)
+        if limit is None:
+            if self._global is not None:
+                await self._take(self._global, "global")
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return
+
+        bucket = self._buckets.get((route, major))
+        if bucket is None:
+            bucket = self._buckets[(route, major)] = _Bucket(*limit)
+        bucket.waiting += 1
+        async with bucket.lock:
+            bucket.waiting -= 1
+            await self._take(bucket, route)
+            if self._global is not None:
+                await self._take(self._global, "global")
+            if self.latency:
+                await asyncio.sleep(self.latency)
+
+    @property
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+    @property
+    def total_429(self) -> int:
+        return sum(self.ratelimited.values())
+
+    def queued(self) -> int:
+        """Calls currently waiting on a route bucket."""
+        return sum(b.waiting for b in self._buckets.values())
+
+
+class FakeRole:
+    def __init__(self, guild: "FakeGuild", name: str, role_id: Optional[int] = None):
+        self.guild = guild
+        self.id = role_id if role_id is not None else next_id()
+        self.name = name
+        self.permissions = discord.Permissions.none()
+        self.mention = f"<@&{self.id}>"
+
+    def is_default(self) -> bool:
+        return self.id == self.guild.id
+
+
+class FakeModLog:
+    """In-memory replacement for the bot's ModLogWriter."""
+
+    def __init__(self):
+        self.rows: list[tuple] = []
+
+    def add(self, *row):
+        self.rows.append(row)
+
+    async def flush(self):
+        pass
+
+
+class FakeChannel(discord.TextChannel):
+    def __init__(self, guild: "FakeGuild", name: str, http: FakeHTTP, channel_id: Optional[int] = None):
+        self.guild = guild  # type: ignore[misc]
+        self.id = channel_id if channel_id is not None else next_id()
+        self.name = name
+        self._http = http
+        self._fake_overwrites: Dict[object, discord.PermissionOverwrite] = {}
+
+    @property
+    def overwrites(self):  # type: ignore[override]
+        return dict(self._fake_overwrites)
+
+    def overwrites_for(self, obj):  # type: ignore[override]
+        return self._fake_overwrites.get(obj, discord.PermissionOverwrite())
+
+    async def send(self, *args, **kwargs):  # type: ignore[override]
+        await self._http.request("POST /channels/{id}/messages", self.id)
+        return FakeMessage(self.guild, None, self, args[0] if args else kwargs.get("content") or "")
+
+    async def set_permissions(self, target, *, overwrite=None, reason=None, **perms):  # type: ignore[override]
+        await self._http.request("PUT /channels/{id}/permissions", self.id)
+        if overwrite is None and perms:
+            overwrite = discord.PermissionOverwrite(**perms)
+        if overwrite is None:
+            self._fake_overwrites.pop(target, None)
+        else:
+            self._fake_overwrites[target] = overwrite
+
+    def get_partial_message(self, message_id: int):  # type: ignore[override]
+        channel = self
+
+        class _Partial:
+            id = message_id
+
+            async def delete(self):
+                await channel._http.request("DELETE /channels/{id}/messages/{id}", channel.id)
+
+        return _Partial()
+
+
+class FakeGuild:
+    def __init__(self, http: FakeHTTP, name: str = "Bench Guild", channels: int = 10):
+        self.id = next_id()
+        self.name = name
+        self.owner_id = 0
+        self.icon = None
+        self._http = http
+        self.roles: list[FakeRole] = [FakeRole(self, "@everyone", self.id)]
+        self.members: Dict[int, FakeMember] = {}
+        self.channels: Dict[int, FakeChannel] = {}
+        for i in range(channels):
+            self.add_channel(f"channel-{i}")
+
+    def add_channel(self, name: str, channel_id: Optional[int] = None) -> FakeChannel:
+        ch = FakeChannel(self, name, self._http, channel_id)
+        self.channels[ch.id] = ch
+        return ch
+
+    @property
+    def default_role(self) -> FakeRole:
+        return self.roles[0]
+
+    @property
+    def text_channels(self) -> list[FakeChannel]:
+        return list(self.channels.values())
+
+    @property
+    def member_count(self) -> int:
+        return len(self.members)
+
+    def get_channel(self, channel_id: int):
+        return self.channels.get(channel_id)
+
+    def get_role(self, role_id: int):
+        return next((r for r in self.roles if r.id == role_id), None)
+
+    def get_member(self, member_id: int):
+        return self.members.get(member_id)
+
+    async def create_role(self, *, name: str, reason: Optional[str] = None):
+        await self._http.request("POST /guilds/{id}/roles", self.id)
+        role = FakeRole(self, name)
+        self.roles.append(role)
+        return role
+
+
+class FakeMember(discord.Member):
+    def __init__(self, guild: FakeGuild, name: str, http: FakeHTTP, bot: bool = False):
+        self.guild = guild  # type: ignore[misc]
+        self._fake_id = next_id()
+        self._fake_name = name
+        self._fake_bot = bot
+        self._fake_roles: list[FakeRole] = [guild.default_role]
+        self._http = http
+        self._joined = time.time()
+        guild.members[self._fake_id] = self
+
+    # identity
+    @property
+    def id(self):  # type: ignore[override]
+        return self._fake_id
+
+    @property
+    def name(self):  # type: ignore[override]
+        return self._fake_name
+
+    @property
+    def display_name(self):  # type: ignore[override]
+        return self._fake_name
+
+    @property
+    def mention(self):  # type: ignore[override]
+        return f"<@{self._fake_id}>"
+
+    @property
+    def bot(self):  # type: ignore[override]
+        return self._fake_bot
+
+    @property
+    def avatar(self):  # type: ignore[override]
+        return None
+
+    @property
+    def created_at(self):  # type: ignore[override]
+        return discord.utils.utcnow()
+
+    @property
+    def roles(self):  # type: ignore[override]
+        return list(self._fake_roles)
+
+    def __str__(self):
+        return self._fake_name
+
+    def __hash__(self):
+        return hash(self._fake_id)
+
+    # API calls
+    async def send(self, *args, **kwargs):  # type: ignore[override]
+        await self._http.request("POST /users/@me/channels + message")
+        return FakeMessage(self.guild, None, None, args[0] if args else kwargs.get("content") or "")
+
+    async def add_roles(self, *roles, reason=None, atomic=True):  # type: ignore[override]
+        for role in roles:
+            await self._http.request("PUT /guilds/{id}/members/{id}/roles/{id}", self.guild.id)
+            if role not in self._fake_roles:
+                self._fake_roles.append(role)
+
+    async def edit(self, *, roles=None, reason=None, **kwargs):  # type: ignore[override]
+        await self._http.request("PATCH /guilds/{id}/members/{id}", self.guild.id)
+        if roles is not None:
+            self._fake_roles = [self.guild.default_role] + list(roles)
+
+
+class FakeMessage:
+    def __init__(self, guild, author, channel, content: str):
+        self.id = next_id()
+        self.guild = guild
+        self.author = author
+        self.channel = channel
+        self.content = content
+        self.embeds: list = []
+        self.attachments: list = []
+        self.mentions: list = []
+        self.role_mentions: list = []
+        self.mention_everyone = False
+
+    async def delete(self):
+        if self.channel is not None:
+            await self.channel._http.request("DELETE /channels/{id}/messages/{id}", self.channel.id)
+
+
+class FakeBot:
+    """Just enough of UltimateBot for cogs to run without a gateway."""
+
+    def __init__(self, http: FakeHTTP):
+        self.http_stub = http
+        self.db = None
+        self.modlog = FakeModLog()
+        self.settings = None
+        self.perms = PermissionService()
+        self.guilds: list[FakeGuild] = []
+        self._cogs: Dict[str, object] = {}
+        self._ready = asyncio.Event()
+
+    async def wait_until_ready(self):
+        # background loops that wait for READY simply never start
+        await self._ready.wait()
+
+    def is_ready(self) -> bool:
+        return False
+
+    def get_guild(self, guild_id: int):
+        return next((g for g in self.guilds if g.id == guild_id), None)
+
+    def get_cog(self, name: str):
+        return self._cogs.get(name)
+
+    def add_cog_instance(self, cog):
+        self._cogs[type(cog).__name__] = cog
+
+    def add_view(self, view, *, message_id=None):
+        pass
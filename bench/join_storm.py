@@ -0,0 +1,234 @@
+# bench/join_storm.py
+#
+# Offline join-storm simulator for AutoModCog and WelcomeCog.
+#
+#   python -m bench.join_storm --rates 5,10,25,50 --duration 10
+#   python -m bench.join_storm --rates 20 --firewall --latency 0.08
+#
+# Joins arrive at a fixed rate and both on_member_join listeners run as
+# separate tasks, the way discord.py dispatches events. API calls go through
+# FakeHTTP with approximate Discord rate limits, so 429s and per-route
+# queueing show up in the numbers. The database is a real in-memory
+# aiosqlite connection with the bot's schema and a real ModLogWriter.
+# Runs in real time: each rate takes `duration` seconds plus drain time.
+
+import argparse
+import asyncio
+import time
+from typing import Iterable, Optional
+
+import aiosqlite
+
+from bench.fakes import FakeBot, FakeGuild, FakeHTTP, FakeMember, FakeRole
+from cogs.automod import AutoModCog
+from cogs.welcome import WelcomeCog
+from config import (
+    LOG_CHANNEL_ID,
+    MODLOG_BATCH_SIZE,
+    MODLOG_MAX_LATENCY,
+    VERIFICATION_CHANNEL_ID,
+)
+from utils.modlog import ModLogWriter
+from utils.settings import GuildSettingsCache
+from utils.storage import migrate
+
+# Approximate public Discord limits: route -> (requests, per seconds).
+# Channel routes are bucketed per channel, member/role routes per guild,
+# opening DMs is shared across the bot.
+DISCORD_LIMITS = {
+    "POST /channels/{id}/messages": (5, 5.0),
+    "PUT /channels/{id}/permissions": (10, 10.0),
+    "DELETE /channels/{id}/messages/{id}": (5, 1.0),
+    "PUT /guilds/{id}/members/{id}/roles/{id}": (10, 10.0),
+    "PATCH /guilds/{id}/members/{id}": (10, 10.0),
+    "POST /guilds/{id}/roles": (10, 10.0),
+    "POST /users/@me/channels + message": (5, 5.0),
+}
+GLOBAL_LIMIT = (50, 1.0)
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+async def build_world(latency: float, firewall: bool):
+    http = FakeHTTP(latency=latency, limits=DISCORD_LIMITS, global_limit=GLOBAL_LIMIT)
+    bot = FakeBot(http)
+    guild = FakeGuild(http, channels=5)
+    bot.guilds.append(guild)
+    guild.add_channel("logs", LOG_CHANNEL_ID)
+    guild.add_channel("verification", VERIFICATION_CHANNEL_ID)
+    welcome = guild.add_channel("welcome")
+    autorole = FakeRole(guild, "Member")
+    guild.roles.append(autorole)
+
+    bot.db = await aiosqlite.connect(":memory:")
+    await migrate(bot.db)
+    await bot.db.execute(
+        "INSERT INTO guild_settings (guild_id, welcome_channel_id, autorole_id) VALUES (?, ?, ?)",
+        (guild.id, welcome.id, autorole.id),
+    )
+    await bot.db.commit()
+    bot.modlog = ModLogWriter(bot.db, MODLOG_BATCH_SIZE, MODLOG_MAX_LATENCY)  # type: ignore[assignment]
+    bot.modlog.start()
+    bot.settings = GuildSettingsCache(bot.db)  # type: ignore[attr-defined]
+
+    automod = AutoModCog(bot)  # type: ignore[arg-type]
+    await automod.cog_load()
+    welcome_cog = WelcomeCog(bot)  # type: ignore[arg-type]
+    await welcome_cog.cog_load()
+    bot.add_cog_instance(automod)
+    bot.add_cog_instance(welcome_cog)
+    if firewall:
+        await automod.enable_firewall(guild, "join storm bench")  # type: ignore[arg-type]
+    return http, bot, guild, automod, welcome_cog
+
+
+async def run_rate(
+    rate: float,
+    duration: float,
+    latency: float,
+    firewall: bool,
+    drain_timeout: float,
+) -> dict:
+    http, bot, guild, automod, welcome_cog = await build_world(latency, firewall)
+    loop = asyncio.get_running_loop()
+    calls_before = http.total
+
+    joined_at: dict[int, float] = {}
+    handled: list[float] = []
+    captcha_latency: list[float] = []
+    in_flight: set[asyncio.Task] = set()
+    peak = {"joins": 0, "http_queue": 0, "dm_queue": 0}
+
+    # time from join until the CAPTCHA prompt is out
+    start_captcha = automod.start_captcha
+
+    async def timed_captcha(member):
+        await start_captcha(member)
+        captcha_latency.append(loop.time() - joined_at[member.id])
+
+    automod.start_captcha = timed_captcha  # type: ignore[method-assign]
+
+    async def handle(member: FakeMember):
+        # one task per listener, like discord.py's dispatch
+        await asyncio.gather(
+            automod.on_member_join(member),  # type: ignore[arg-type]
+            welcome_cog.on_member_join(member),  # type: ignore[arg-type]
+            return_exceptions=True,
+        )
+        handled.append(loop.time() - joined_at[member.id])
+
+    async def sampler():
+        while True:
+            peak["joins"] = max(peak["joins"], len(in_flight))
+            peak["http_queue"] = max(peak["http_queue"], http.queued())
+            peak["dm_queue"] = max(peak["dm_queue"], welcome_cog.dispatcher.dm_backlog)
+            await asyncio.sleep(0.1)
+
+    sampler_task = asyncio.create_task(sampler())
+    interval = 1.0 / rate
+    total = int(rate * duration)
+    started = loop.time()
+    for i in range(total):
+        delay = started + i * interval - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        member = FakeMember(guild, f"joiner{i}", http)
+        joined_at[member.id] = loop.time()
+        task = asyncio.create_task(handle(member))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    backlog_at_end = len(in_flight)
+    drain_started = loop.time()
+    drained = True
+    if in_flight:
+        _, pending = await asyncio.wait(set(in_flight), timeout=drain_timeout)
+        drained = not pending
+        for task in pending:
+            task.cancel()
+    drain_time = loop.time() - drain_started
+
+    sampler_task.cancel()
+    welcomes = welcome_cog.dispatcher.summary()
+    await welcome_cog.cog_unload()
+    await automod.cog_unload()
+    await bot.modlog.close()
+    await bot.db.close()
+
+    handled.sort()
+    captcha_latency.sort()
+    return {
+        "rate": rate,
+        "joins": total,
+        "handled": len(handled),
+        "p50_s": percentile(handled, 50),
+        "p99_s": percentile(handled, 99),
+        "captcha_p99_s": percentile(captcha_latency, 99),
+        "captchas": len(captcha_latency),
+        "api_per_join": (http.total - calls_before) / total if total else 0.0,
+        "http_429": http.total_429,
+        "retry_wait_s": http.retry_wait,
+        "peak_joins": peak["joins"],
+        "peak_http_queue": peak["http_queue"],
+        "peak_dm_queue": peak["dm_queue"],
+        "welcomes": welcomes,
+        "backlog_at_end": backlog_at_end,
+        "drain_s": drain_time,
+        "drained": drained,
+        "by_route": http.calls,
+        "by_route_429": http.ratelimited,
+    }
+
+
+def parse_list(value: str, cast) -> list:
+    return [cast(v) for v in value.split(",") if v.strip()]
+
+
+async def main(argv: Optional[Iterable[str]] = None):
+    parser = argparse.ArgumentParser(description="Join storm against AutoModCog + WelcomeCog")
+    parser.add_argument("--rates", default="5,10,25,50", help="joins per second to try")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of joins per rate")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated API round trip (s)")
+    parser.add_argument("--firewall", action="store_true", help="start with the firewall on")
+    parser.add_argument("--drain-timeout", type=float, default=60.0)
+    parser.add_argument("--sla", type=float, default=10.0, help="max p99 join-to-CAPTCHA seconds")
+    parser.add_argument("--routes", action="store_true", help="print per-route call / 429 counts")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    print(
+        f"{'joins/s':>7} {'done':>9} {'p50 s':>7} {'p99 s':>7} {'capt p99':>8} "
+        f"{'api/join':>8} {'429s':>6} {'peak':>5} {'backlog':>7} {'drain s':>7}  verdict"
+    )
+    sustained = 0.0
+    for rate in parse_list(args.rates, float):
+        t0 = time.perf_counter()
+        r = await run_rate(rate, args.duration, args.latency, args.firewall, args.drain_timeout)
+        # "behind" = work still queued past ~2s of arrivals, or CAPTCHAs slower than the SLA
+        behind = (
+            not r["drained"]
+            or r["backlog_at_end"] > 2 * rate
+            or (r["captchas"] and r["captcha_p99_s"] > args.sla)
+        )
+        if not behind:
+            sustained = max(sustained, rate)
+        print(
+            f"{rate:>7.0f} {str(r['handled']) + '/' + str(r['joins']):>9} {r['p50_s']:>7.2f} {r['p99_s']:>7.2f} "
+            f"{r['captcha_p99_s']:>8.2f} {r['api_per_join']:>8.2f} {r['http_429']:>6} "
+            f"{r['peak_joins']:>5} {r['backlog_at_end']:>7} "
+            f"{r['drain_s']:>7.1f}{'' if r['drained'] else '+'}  "
+            f"{'BEHIND' if behind else 'ok'}  ({time.perf_counter() - t0:.0f}s)"
+        )
+        print(f"{'':>9}welcomes: {r['welcomes']} (peak DM queue {r['peak_dm_queue']})")
+        if args.routes:
+            for route, n in r["by_route"].most_common():
+                print(f"{'':>9}{n:>6} calls  {r['by_route_429'][route]:>5} 429s  {route}")
+    print(f"highest sustained rate: {sustained:.0f} joins/s" if sustained else "no rate sustained")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
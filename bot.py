@@ -7,7 +7,20 @@ import discord
 from discord.ext import commands
 import aiosqlite
 
-from config import TOKEN, GUILD_ID, DB_PATH
+from config import (
+    TOKEN,
+    GUILD_ID,
+    DB_PATH,
+    MODLOG_BATCH_SIZE,
+    MODLOG_MAX_LATENCY,
+    MODLOG_MAX_QUEUED,
+    MODLOG_RETRY_SECONDS,
+    SETTINGS_POLL_SECONDS,
+)
+from utils.modlog import ModLogWriter
+from utils.permissions import PermissionService
+from utils.settings import GuildSettingsCache
+from utils.storage import migrate, open_db
 
 intents = discord.Intents.default()
 intents.members = True
@@ -22,14 +35,34 @@ class UltimateBot(commands.Bot):
             help_command=None,
         )
         self.db: Optional[aiosqlite.Connection] = None
+        self.modlog: Optional[ModLogWriter] = None
+        self.settings: Optional[GuildSettingsCache] = None
+        self.perms = PermissionService()
 
     async def setup_hook(self) -> None:
         # Ensure data dir
         os.makedirs("data", exist_ok=True)
 
+        # keep the shared staff cache in sync with role changes
+        self.perms.attach(self)
+
         # Database
-        self.db = await aiosqlite.connect(DB_PATH)
-        await self._init_db()
+        self.db = await open_db(DB_PATH)
+        applied = await migrate(self.db)
+        if applied:
+            print(f"[DB] Applied migrations: {', '.join(map(str, applied))}")
+        # own connection: a failed batch is rolled back without touching
+        # anyone else's open transaction
+        self.modlog = ModLogWriter(
+            await open_db(DB_PATH),
+            MODLOG_BATCH_SIZE,
+            MODLOG_MAX_LATENCY,
+            MODLOG_MAX_QUEUED,
+            MODLOG_RETRY_SECONDS,
+        )
+        self.modlog.start()
+        self.settings = GuildSettingsCache(self.db, SETTINGS_POLL_SECONDS)
+        self.settings.start()
 
         # Load cogs
         for ext in (
@@ -61,49 +94,14 @@ class UltimateBot(commands.Bot):
             print("[SYNC] Falling back to global sync...")
             await self.tree.sync()
 
-    async def _init_db(self):
-        assert self.db is not None
-        await self.db.executescript(
-            """
-            CREATE TABLE IF NOT EXISTS guild_settings (
-                guild_id            INTEGER PRIMARY KEY,
-                welcome_channel_id  INTEGER,
-                welcome_message     TEXT,
-                autorole_id         INTEGER,
-                default_announce_id INTEGER
-            );
-
-            CREATE TABLE IF NOT EXISTS scheduled_announcements (
-                id          INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id    INTEGER,
-                channel_id  INTEGER,
-                message     TEXT,
-                run_at      INTEGER,
-                sent        INTEGER DEFAULT 0
-            );
-
-            CREATE TABLE IF NOT EXISTS moderation_logs (
-                id          INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id    INTEGER,
-                user_id     INTEGER,
-                actor_id    INTEGER,
-                action      TEXT,
-                reason      TEXT,
-                created_at  INTEGER
-            );
-
-            CREATE TABLE IF NOT EXISTS tickets (
-                id              INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id        INTEGER,
-                channel_id      INTEGER,
-                opener_id       INTEGER,
-                status          TEXT,
-                created_at      INTEGER,
-                closed_at       INTEGER
-            );
-            """
-        )
-        await self.db.commit()
+    async def close(self) -> None:
+        # cogs are unloaded first, then any queued log rows are written
+        await super().close()
+        if self.modlog is not None:
+            await self.modlog.close()
+            await self.modlog.db.close()
+        if self.settings is not None:
+            await self.settings.close()
 
 
 bot = UltimateBot()
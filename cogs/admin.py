@@ -1,43 +1,118 @@
 # cogs/admin.py
 
+import datetime
+import re
 import time
 from typing import Optional
 
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands
 
 from config import (
-    ADMIN_ROLE_IDS,
     LOG_CHANNEL_ID,
+    ANNOUNCE_CONCURRENCY,
+    ANNOUNCE_RETRY_SECONDS,
+    ANNOUNCE_MAX_ATTEMPTS,
+    PURGE_MAX_AMOUNT,
+    PURGE_SCAN_LIMIT,
+    PURGE_SINGLE_DELETE_DELAY,
 )
+from utils.announcements import (
+    PENDING,
+    add_targets,
+    cancel_announcement,
+    create_announcement,
+    fail_exhausted,
+    fan_out,
+    get_pending,
+    list_pending,
+    mark_sent,
+    next_occurrence,
+    pending_schedule,
+    reschedule,
+    start_occurrence,
+    target_counts,
+)
+from utils.modlog_queries import LogFilter, LogPage, fetch_page
+from utils.permissions import is_admin as _is_admin
+from utils.purge import PurgeFilter, PurgeReport, purge
+from utils.scheduler import Scheduler
 
+# <#123> mentions or bare channel IDs
+CHANNEL_REF_RE = re.compile(r"\d{15,21}")
 
-def is_admin():
-    async def predicate(interaction: discord.Interaction):
-        member = interaction.user
-        if isinstance(member, discord.Member):
-            if member.guild_permissions.administrator:
-                return True
-            if any(r.id in ADMIN_ROLE_IDS for r in member.roles):
-                return True
-
-        await interaction.response.send_message(
-            "❌ You must be an administrator / staff to use this command.",
-            ephemeral=True,
-        )
-        raise app_commands.CheckFailure("Not admin")
 
-    return app_commands.check(predicate)
+def is_admin():
+    return _is_admin("❌ You must be an administrator / staff to use this command.")
+
+
+class LogPager(discord.ui.View):
+    """Newer / Older buttons for /logs, walking the log by id cursor."""
+
+    def __init__(self, db, guild_id: int, filt: LogFilter, limit: int, owner_id: int, page: LogPage):
+        super().__init__(timeout=300)
+        self.db = db
+        self.guild_id = guild_id
+        self.filt = filt
+        self.limit = limit
+        self.owner_id = owner_id
+        self.page = page
+        self.sync_buttons()
+
+    def sync_buttons(self):
+        self.newer.disabled = not self.page.has_newer
+        self.older.disabled = not self.page.has_older
+
+    def render(self) -> str:
+        header = f"Filter: {self.filt.describe()}\n" if self.filt.describe() else ""
+        body = "\n".join(e.format() for e in self.page.entries)
+        # keep inside the 2000 char message limit
+        return (header + "```" + body[: 1900 - len(header)] + "```")
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("❌ Not your log view.", ephemeral=True)
+            return False
+        return True
+
+    async def show(self, interaction: discord.Interaction, before_id=None, after_id=None):
+        page = await fetch_page(self.db, self.guild_id, self.filt, self.limit, before_id, after_id)
+        if page.entries:
+            self.page = page
+        elif after_id is not None:
+            # nothing newer (or older) any more: keep the page, drop the button
+            self.page.has_newer = False
+        else:
+            self.page.has_older = False
+        self.sync_buttons()
+        await interaction.response.edit_message(content=self.render(), view=self)
+
+    @discord.ui.button(label="◀ Newer", style=discord.ButtonStyle.secondary)
+    async def newer(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, after_id=self.page.newest_id)
+
+    @discord.ui.button(label="Older ▶", style=discord.ButtonStyle.secondary)
+    async def older(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, before_id=self.page.oldest_id)
 
 
 class AdminCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.check_scheduled_announcements.start()
+        self.scheduler = Scheduler(self.send_scheduled_announcement)
+
+    async def cog_load(self):
+        if self.bot.db is not None:
+            # overdue rows (e.g. after downtime) are due at once and fire once
+            for ann_id, run_at in await pending_schedule(self.bot.db):
+                self.scheduler.add(ann_id, run_at)
+        self.scheduler.start(self.bot.wait_until_ready)
 
-    def cog_unload(self):
-        self.check_scheduled_announcements.cancel()
+    async def cog_unload(self):
+        await self.scheduler.close()
+        if self.bot.modlog is not None:
+            await self.bot.modlog.flush()
 
     # ---------- internal: moderation log ----------
 
@@ -49,21 +124,12 @@ class AdminCog(commands.Cog):
         action: str,
         reason: str = "",
     ):
-        if self.bot.db is None:
+        if self.bot.modlog is None:
             return
 
         user_id = user.id if user else 0
         actor_id = actor.id
-        now = int(time.time())
-
-        await self.bot.db.execute(
-            """
-            INSERT INTO moderation_logs (guild_id, user_id, actor_id, action, reason, created_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            (guild.id, user_id, actor_id, action, reason, now),
-        )
-        await self.bot.db.commit()
+        self.bot.modlog.add(guild.id, user_id, actor_id, action, reason)
 
         log_channel = guild.get_channel(LOG_CHANNEL_ID)
         if isinstance(log_channel, discord.TextChannel):
@@ -142,22 +208,43 @@ class AdminCog(commands.Cog):
 
     # ---------- scheduled announcements ----------
 
+    def resolve_targets(
+        self,
+        user: discord.abc.User,
+        text: str,
+    ) -> tuple[list[discord.TextChannel], list[str]]:
+        """Channel mentions / IDs -> text channels the user is staff in."""
+        channels: list[discord.TextChannel] = []
+        rejected: list[str] = []
+        for raw in CHANNEL_REF_RE.findall(text):
+            ch = self.bot.get_channel(int(raw))
+            member = ch.guild.get_member(user.id) if isinstance(ch, discord.TextChannel) else None
+            if member is None or not self.bot.perms.is_staff(member):
+                rejected.append(raw)
+            elif ch not in channels:
+                channels.append(ch)  # type: ignore[arg-type]
+        return channels, rejected
+
     @app_commands.command(
         name="schedule_announce",
-        description="Schedule an announcement for later.",
+        description="Schedule a one-off or repeating announcement.",
     )
     @is_admin()
     @app_commands.describe(
         message="Text of the announcement.",
-        delay_minutes="Delay before sending (in minutes).",
+        delay_minutes="Delay before the first send (in minutes).",
         channel="Channel to send in (optional).",
+        repeat_minutes="Repeat every N minutes (optional).",
+        extra_channels="More channels (mentions or IDs, any server where you are staff).",
     )
     async def schedule_announce(
         self,
         interaction: discord.Interaction,
         message: str,
-        delay_minutes: app_commands.Range[int, 1, 60 * 24],
+        delay_minutes: app_commands.Range[int, 1, 60 * 24 * 30],
         channel: Optional[discord.TextChannel] = None,
+        repeat_minutes: Optional[app_commands.Range[int, 5, 60 * 24 * 30]] = None,
+        extra_channels: Optional[str] = None,
     ):
         guild = interaction.guild
         if guild is None or self.bot.db is None:
@@ -176,19 +263,30 @@ class AdminCog(commands.Cog):
             )
             return
 
+        targets = [channel]
+        rejected: list[str] = []
+        if extra_channels:
+            extra, rejected = self.resolve_targets(interaction.user, extra_channels)
+            targets += [ch for ch in extra if ch != channel]
+        if rejected:
+            await interaction.response.send_message(
+                "❌ Unknown channel(s) or not staff there: " + ", ".join(rejected),
+                ephemeral=True,
+            )
+            return
+
         run_at = int(time.time()) + delay_minutes * 60
+        interval = (repeat_minutes or 0) * 60
 
-        await self.bot.db.execute(
-            """
-            INSERT INTO scheduled_announcements (guild_id, channel_id, message, run_at)
-            VALUES (?, ?, ?, ?)
-            """,
-            (guild.id, channel.id, message, run_at),
-        )
+        ann_id = await create_announcement(self.bot.db, guild.id, channel.id, message, run_at, interval)
+        await add_targets(self.bot.db, ann_id, [(ch.guild.id, ch.id) for ch in targets])
         await self.bot.db.commit()
+        self.scheduler.add(ann_id, run_at)
 
+        where = channel.mention if len(targets) == 1 else f"{len(targets)} channels"
+        repeat = f", then every {repeat_minutes} minute(s)" if repeat_minutes else ""
         await interaction.response.send_message(
-            f"✅ Scheduled announcement in {channel.mention} in {delay_minutes} minute(s).",
+            f"✅ Scheduled announcement #{ann_id} in {where} in {delay_minutes} minute(s){repeat}.",
             ephemeral=True,
         )
 
@@ -197,66 +295,142 @@ class AdminCog(commands.Cog):
             actor=interaction.user,
             user=None,
             action="schedule_announce",
-            reason=f"Channel: #{channel.name}, delay={delay_minutes}m",
+            reason=(
+                f"#{ann_id}: {len(targets)} channel(s) starting #{channel.name}, "
+                f"delay={delay_minutes}m, repeat={repeat_minutes or 0}m"
+            ),
         )
 
-    @tasks.loop(seconds=60)
-    async def check_scheduled_announcements(self):
-        if self.bot.db is None:
+    @app_commands.command(
+        name="schedule_list",
+        description="List pending scheduled announcements for this server.",
+    )
+    @is_admin()
+    async def schedule_list(self, interaction: discord.Interaction):
+        guild = interaction.guild
+        if guild is None or self.bot.db is None:
+            await interaction.response.send_message("❌ Guild not found.", ephemeral=True)
             return
 
-        now = int(time.time())
-        cursor = await self.bot.db.execute(
-            """
-            SELECT id, guild_id, channel_id, message
-            FROM scheduled_announcements
-            WHERE sent = 0 AND run_at <= ?
-            """,
-            (now,),
-        )
-        rows = await cursor.fetchall()
-
-        for ann_id, guild_id, channel_id, message in rows:
-            guild = self.bot.get_guild(guild_id)
-            if guild is None:
-                continue
-            channel = guild.get_channel(channel_id)
-            if not isinstance(channel, discord.TextChannel):
-                continue
+        pending = await list_pending(self.bot.db, guild.id, 20)
+        if not pending:
+            await interaction.response.send_message("ℹ No scheduled announcements.", ephemeral=True)
+            return
 
-            embed = discord.Embed(
-                title="📡 Scheduled Transmission",
-                description=message,
-                color=discord.Color.blue(),
+        lines = []
+        for ann in pending:
+            counts = await target_counts(self.bot.db, ann.id)
+            status = ", ".join(f"{n} {s}" for s, n in sorted(counts.items())) or "1 pending"
+            repeat = f" every {ann.interval_seconds // 60}m" if ann.interval_seconds else ""
+            lines.append(
+                f"#{ann.id} <t:{ann.run_at}:R>{repeat} [{status}] {ann.message[:60]}"
             )
-            await channel.send(embed=embed)
+        await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
+    @app_commands.command(
+        name="schedule_cancel",
+        description="Cancel a scheduled announcement.",
+    )
+    @is_admin()
+    @app_commands.describe(announcement_id="ID shown by /schedule_list.")
+    async def schedule_cancel(self, interaction: discord.Interaction, announcement_id: int):
+        guild = interaction.guild
+        if guild is None or self.bot.db is None:
+            await interaction.response.send_message("❌ Guild not found.", ephemeral=True)
+            return
 
-            await self.bot.db.execute(
-                "UPDATE scheduled_announcements SET sent = 1 WHERE id = ?",
-                (ann_id,),
+        if not await cancel_announcement(self.bot.db, announcement_id, guild.id):
+            await interaction.response.send_message(
+                f"❌ No pending announcement #{announcement_id}.", ephemeral=True
             )
-        await self.bot.db.commit()
+            return
+        self.scheduler.remove(announcement_id)
+        await interaction.response.send_message(
+            f"🗑 Announcement #{announcement_id} cancelled.", ephemeral=True
+        )
+        await self.log_action(
+            guild=guild,
+            actor=interaction.user,
+            user=None,
+            action="schedule_cancel",
+            reason=f"#{announcement_id}",
+        )
+
+    def resolve_channel(self, guild_id: int, channel_id: int) -> Optional[discord.TextChannel]:
+        guild = self.bot.get_guild(guild_id)
+        channel = guild.get_channel(channel_id) if guild else None
+        return channel if isinstance(channel, discord.TextChannel) else None
 
-    @check_scheduled_announcements.before_loop
-    async def before_check_scheduled_announcements(self):
-        await self.bot.wait_until_ready()
+    async def send_scheduled_announcement(self, ann_id: int):
+        db = self.bot.db
+        if db is None:
+            return
+
+        ann = await get_pending(db, ann_id)
+        if ann is None:
+            return
+
+        targets = await start_occurrence(db, ann_id, ann.run_at, (ann.guild_id, ann.channel_id))
+        embed = discord.Embed(
+            title="📡 Scheduled Transmission",
+            description=ann.message,
+            color=discord.Color.blue(),
+        )
+        report = await fan_out(
+            db,
+            ann_id,
+            targets,
+            self.resolve_channel,
+            lambda ch: ch.send(embed=embed),
+            ANNOUNCE_CONCURRENCY,
+        )
+        if report.total:
+            print(f"[ANNOUNCE] #{ann_id}: {report.summary()}")
+
+        # transient failures: retry only the targets still pending
+        await fail_exhausted(db, ann_id, ANNOUNCE_MAX_ATTEMPTS)
+        counts = await target_counts(db, ann_id)
+        if counts.get(PENDING):
+            self.scheduler.add(ann_id, time.time() + ANNOUNCE_RETRY_SECONDS)
+            return
+
+        if ann.interval_seconds:
+            next_run = next_occurrence(ann.run_at, ann.interval_seconds, int(time.time()))
+            await reschedule(db, ann_id, next_run)
+            self.scheduler.add(ann_id, next_run)
+        else:
+            await mark_sent(db, ann_id)
 
     # ---------- /clear ----------
 
     @app_commands.command(
         name="clear",
-        description="Clear messages in a channel (admin only).",
+        description="Delete messages, optionally filtered (admin only).",
     )
     @is_admin()
     @app_commands.describe(
-        amount="How many messages to delete (1–200).",
+        amount=f"How many matching messages to delete (1–{PURGE_MAX_AMOUNT}).",
         channel="Channel to clear (default: current).",
+        user="Only messages from this member.",
+        contains="Only messages matching this regex (case-insensitive).",
+        newer_than_hours="Only messages from the last N hours.",
+        older_than_hours="Only messages older than N hours.",
+        attachments_only="Only messages with attachments.",
+        bots_only="Only messages from bots.",
+        all_channels="Clear every text channel in the server (ignores channel).",
     )
     async def clear(
         self,
         interaction: discord.Interaction,
-        amount: app_commands.Range[int, 1, 200],
+        amount: app_commands.Range[int, 1, PURGE_MAX_AMOUNT],
         channel: Optional[discord.TextChannel] = None,
+        user: Optional[discord.Member] = None,
+        contains: Optional[str] = None,
+        newer_than_hours: Optional[app_commands.Range[int, 1, 24 * 365]] = None,
+        older_than_hours: Optional[app_commands.Range[int, 1, 24 * 365 * 10]] = None,
+        attachments_only: bool = False,
+        bots_only: bool = False,
+        all_channels: bool = False,
     ):
         guild = interaction.guild
         if guild is None:
@@ -265,23 +439,84 @@ class AdminCog(commands.Cog):
             )
             return
 
-        target_channel = channel or interaction.channel  # type: ignore
-        deleted = await target_channel.purge(limit=amount + 1)
-        count = max(len(deleted) - 1, 0)
+        try:
+            pattern = re.compile(contains, re.IGNORECASE) if contains else None
+        except re.error as e:
+            await interaction.response.send_message(
+                f"❌ Invalid regex: {e}", ephemeral=True
+            )
+            return
 
-        await interaction.response.send_message(
-            f"🧹 Cleared `{count}` messages in {target_channel.mention}.",
-            ephemeral=True,
+        now = discord.utils.utcnow()
+        filt = PurgeFilter(
+            author_id=user.id if user else None,
+            pattern=pattern,
+            after=now - datetime.timedelta(hours=newer_than_hours) if newer_than_hours else None,
+            before=now - datetime.timedelta(hours=older_than_hours) if older_than_hours else None,
+            attachments_only=attachments_only,
+            bots_only=bots_only,
         )
+        targets = (
+            list(guild.text_channels)
+            if all_channels
+            else [channel or interaction.channel]  # type: ignore[list-item]
+        )
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        status = await interaction.followup.send("⏳ Scanning...", ephemeral=True, wait=True)
+
+        last = 0.0
 
+        async def progress(report: PurgeReport):
+            nonlocal last
+            if time.monotonic() - last < 2:
+                return
+            last = time.monotonic()
+            try:
+                await status.edit(
+                    content=f"⏳ Deleted {report.deleted} of {report.matched} matching "
+                    f"({report.scanned} scanned, channel {report.channels}/{len(targets)})"
+                )
+            except discord.HTTPException:
+                pass
+
+        report = await purge(
+            targets,
+            filt,
+            amount,
+            PURGE_SCAN_LIMIT,
+            PURGE_SINGLE_DELETE_DELAY,
+            progress,
+        )
+        where = "all channels" if all_channels else f"#{targets[0].name}"
+        filters = ", ".join(
+            f for f in (
+                f"user={user.id}" if user else "",
+                f"contains={contains!r}" if contains else "",
+                f"newer={newer_than_hours}h" if newer_than_hours else "",
+                f"older={older_than_hours}h" if older_than_hours else "",
+                "attachments" if attachments_only else "",
+                "bots" if bots_only else "",
+            ) if f
+        )
         await self.log_action(
             guild=guild,
             actor=interaction.user,
-            user=None,
+            user=user,
             action="clear",
-            reason=f"{count} messages in #{target_channel.name}",
+            reason=f"{report.deleted} messages in {where}" + (f" ({filters})" if filters else ""),
         )
 
+        # long purges outlive the 15-minute interaction token
+        result = f"🧹 Cleared: {report.summary()}."
+        try:
+            await status.edit(content=result)
+        except discord.HTTPException:
+            try:
+                await interaction.channel.send(f"{interaction.user.mention} {result}")  # type: ignore[union-attr]
+            except discord.HTTPException:
+                pass
+
     # ---------- /slowmode ----------
 
     @app_commands.command(
@@ -371,16 +606,26 @@ class AdminCog(commands.Cog):
 
     @app_commands.command(
         name="logs",
-        description="View last moderation logs.",
+        description="Browse moderation logs, optionally filtered.",
     )
     @is_admin()
     @app_commands.describe(
-        limit="How many entries to show (1–50).",
+        limit="Entries per page (1–25).",
+        user="Only actions against this user.",
+        actor="Only actions taken by this user.",
+        action="Only this action (e.g. clear, lockdown, spam_mute, captcha_pass).",
+        newer_than_hours="Only entries from the last N hours.",
+        older_than_hours="Only entries older than N hours.",
     )
     async def logs(
         self,
         interaction: discord.Interaction,
-        limit: app_commands.Range[int, 1, 50] = 10,
+        limit: app_commands.Range[int, 1, 25] = 10,
+        user: Optional[discord.User] = None,
+        actor: Optional[discord.User] = None,
+        action: Optional[str] = None,
+        newer_than_hours: Optional[app_commands.Range[int, 1, 24 * 365 * 10]] = None,
+        older_than_hours: Optional[app_commands.Range[int, 1, 24 * 365 * 10]] = None,
     ):
         guild = interaction.guild
         if guild is None or self.bot.db is None:
@@ -389,35 +634,25 @@ class AdminCog(commands.Cog):
             )
             return
 
-        cur = await self.bot.db.execute(
-            """
-            SELECT user_id, actor_id, action, reason, created_at
-            FROM moderation_logs
-            WHERE guild_id = ?
-            ORDER BY id DESC
-            LIMIT ?
-            """,
-            (guild.id, limit),
+        now = int(time.time())
+        filt = LogFilter(
+            user_id=user.id if user else None,
+            actor_id=actor.id if actor else None,
+            action=action.strip().lower() if action else None,
+            since=now - newer_than_hours * 3600 if newer_than_hours else None,
+            until=now - older_than_hours * 3600 if older_than_hours else None,
         )
-        rows = await cur.fetchall()
+        page = await fetch_page(self.bot.db, guild.id, filt, limit)
 
-        if not rows:
+        if not page.entries:
             await interaction.response.send_message(
-                "ℹ No moderation logs yet.", ephemeral=True
+                "ℹ No moderation logs match." if filt.describe() else "ℹ No moderation logs yet.",
+                ephemeral=True,
             )
             return
 
-        lines = []
-        for user_id, actor_id, action, reason, created_at in rows:
-            ts = time.strftime("%Y-%m-%d %H:%M", time.localtime(created_at))
-            user_txt = f"{user_id}" if user_id else "-"
-            reason_txt = reason or "-"
-            lines.append(
-                f"[{ts}] action={action}, target={user_txt}, by={actor_id}, reason={reason_txt}"
-            )
-
-        text = "```" + "\n".join(lines) + "```"
-        await interaction.response.send_message(text, ephemeral=True)
+        view = LogPager(self.bot.db, guild.id, filt, limit, interaction.user.id, page)
+        await interaction.response.send_message(view.render(), view=view, ephemeral=True)
 
 
 async def setup(bot: commands.Bot):
@@ -1,91 +1,320 @@
 # cogs/automod.py
 
+import asyncio
 import time
 import re
 import random
-from collections import defaultdict
-from typing import Dict, Tuple, Optional
+from typing import Callable, Optional
 
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
 
 from config import (
-    ADMIN_ROLE_IDS,
     LOG_CHANNEL_ID,
     VERIFICATION_CHANNEL_ID,
     VERIFIED_ROLE_ID,
-    RAID_JOIN_WINDOW,
-    RAID_JOIN_THRESHOLD,
-    LOCKDOWN_HARD_THRESHOLD,
-    FIREWALL_AUTO_RELEASE_MINUTES,
+    LOCKDOWN_CONCURRENCY,
+    CAPTCHA_EXPIRE_ACTION,
     CAPTCHA_EXPIRE_SECONDS,
+    CAPTCHA_SWEEP_SECONDS,
+    QUARANTINE_ROLE_ID,
+    QUARANTINE_ROLE_NAME,
+    QUARANTINE_RETRY_SECONDS,
+    BADWORDS_DIR,
+    BADWORD_WORD_BOUNDARY,
+    WORDLIST_RELOAD_SECONDS,
+    LINK_ALLOWLIST_DIR,
+    LINK_BLOCKLIST_DIR,
+    LOG_DIGEST_WINDOW,
+    LOG_CHANNEL_BURST,
+    AUTOMOD_DISABLED_RULES,
+    AUTOMOD_RULE_ORDER,
+    AUTOMOD_POOL_WORKERS,
+    AUTOMOD_POOL_MAX_PENDING,
+    AUTOMOD_POOL_TIMEOUT,
+    AUTOMOD_OFFLOAD_MIN_LENGTH,
+    AUTOMOD_REGEX_PATTERNS,
+    ATTACHMENT_BLOCKLIST_DIR,
+    ATTACHMENT_MAX_BYTES,
 )
+from utils.captcha_store import CaptchaStore, PendingCaptcha
+from utils.domains import DomainLists, extract_hosts
+from utils.fingerprint import DuplicateDetector
+from utils.listfiles import GuildListCache
+from utils.permissions import is_admin
+from utils.raidstate import RaidStates
+from utils.rules import Rule, RulePipeline, Verdict
+from utils.offload import OffloadPool, match_patterns, sha256_hex
+from utils.lockdown import LockdownReport, has_snapshot, lock_guild, restore_guild, run_channel_jobs
+from utils.logsink import LogChannelSink
+from utils.spamtracker import SpamTracker
+from utils.wordfilter import WordLists
 
 # ---------- BASIC FILTERS ----------
 
-BAD_WORDS = {"badword1", "badword2"}  # fill with real words
+BAD_WORDS = {"badword1", "badword2"}  # defaults, extend via BADWORDS_DIR
 INVITE_RE = re.compile(r"(discord\.gg/|discord\.com/invite/)", re.IGNORECASE)
 
 SPAM_WINDOW = 5        # seconds
 SPAM_MAX_MSG = 5       # messages in window
+SPAM_MAX_TRACKED_USERS = 50_000  # LRU cap on users kept in memory
+SPAM_SWEEP_SECONDS = 60          # how often idle users are dropped
+
+# Only messages carrying a payload (link / mention) are compared, or any
+# message while the firewall is up, so busy guilds' "gg all" chatter is
+# never deleted as a raid.
+DUPE_WINDOW = 60          # seconds of guild messages kept for comparison
+DUPE_MIN_USERS = 5        # distinct users posting the same payload
+DUPE_MAX_DISTANCE = 3     # simhash bits that may differ
+DUPE_MIN_LENGTH = 12      # shorter (normalized) messages are ignored
+
+
+# ---------- RULES ----------
+
+class InviteRule(Rule):
+    name = "invites"
+    cost = 10
+
+    async def check(self, message: discord.Message) -> Optional[Verdict]:
+        if not INVITE_RE.search(message.content):
+            return None
+        return Verdict(
+            "invite_delete",
+            f"⛔ Deleted invite link from {message.author.mention} in {message.channel.mention}.",
+        )
 
 
-def is_admin_member(member: discord.Member) -> bool:
-    if member.guild_permissions.administrator:
-        return True
-    return any(r.id in ADMIN_ROLE_IDS for r in member.roles)
+class BadWordRule(Rule):
+    name = "badwords"
+    cost = 20
+
+    def __init__(self, filters: WordLists):
+        self.filters = filters
+
+    async def check(self, message: discord.Message) -> Optional[Verdict]:
+        assert message.guild is not None
+        if not self.filters.search(message.guild.id, message.content):
+            return None
+        return Verdict(
+            "badword_delete",
+            f"🧱 Deleted bad-word message from {message.author.mention} in {message.channel.mention}.",
+        )
+
 
+class LinkRule(Rule):
+    """Links to blocklisted domains (content and embed URLs)."""
+
+    name = "links"
+    cost = 30
+
+    def __init__(self, allow: DomainLists, block: DomainLists):
+        self.allow = allow
+        self.block = block
+
+    async def check(self, message: discord.Message) -> Optional[Verdict]:
+        assert message.guild is not None
+        guild_id = message.guild.id
+        if self.block.is_empty(guild_id):
+            return None
+        text = message.content
+        if message.embeds:
+            text = "\n".join([text] + [e.url for e in message.embeds if e.url])
+        if "." not in text:
+            return None
+
+        for host in extract_hosts(text):
+            if self.allow.match(guild_id, host):
+                continue
+            listed = self.block.match(guild_id, host)
+            if listed:
+                return Verdict(
+                    "link_delete",
+                    f"🎣 Deleted blocked link (`{host}`) from {message.author.mention} "
+                    f"in {message.channel.mention}.",
+                    reason=f"{host} (listed: {listed})",
+                )
+        return None
 
-def admin_check():
-    async def predicate(interaction: discord.Interaction):
-        member = interaction.user
-        if isinstance(member, discord.Member) and is_admin_member(member):
+
+class DuplicateRule(Rule):
+    """Same payload from many accounts."""
+
+    name = "duplicates"
+    cost = 50
+
+    def __init__(self, detector: DuplicateDetector, is_raiding: Callable[[int], bool]):
+        self.detector = detector
+        self.is_raiding = is_raiding
+
+    @staticmethod
+    def has_payload(message: discord.Message) -> bool:
+        if message.mention_everyone or message.mentions or message.role_mentions:
             return True
-        await interaction.response.send_message("❌ Admin only.", ephemeral=True)
-        raise app_commands.CheckFailure("Not admin")
-    return app_commands.check(predicate)
+        content = message.content
+        return "." in content and next(extract_hosts(content), None) is not None
+
+    async def check(self, message: discord.Message) -> Optional[Verdict]:
+        assert message.guild is not None
+        if not (self.has_payload(message) or self.is_raiding(message.guild.id)):
+            return None
+        earlier = self.detector.check(
+            message.guild.id,
+            message.author.id,
+            message.content,
+            message.channel.id,
+            message.id,
+            time.time(),
+        )
+        if earlier is None:
+            return None
+        return Verdict(
+            "dupe_delete",
+            f"👥 Deleted duplicate raid message from {message.author.mention} in {message.channel.mention}.",
+            reason=f"{len(earlier) + 1} copies removed",
+            # copies posted before the cluster was recognised
+            extra_deletes=[(e.channel_id, e.message_id) for e in earlier],
+        )
+
+
+class RegexSetRule(Rule):
+    """Configured regex set; long messages are matched in the process pool."""
+
+    name = "regex"
+    cost = 60
+
+    def __init__(self, patterns: list[str], pool: OffloadPool, min_length: int):
+        self.patterns = tuple(patterns)
+        self.pool = pool
+        self.min_length = min_length
+
+    async def check(self, message: discord.Message) -> Optional[Verdict]:
+        if not self.patterns or not message.content:
+            return None
+        if len(message.content) < self.min_length:
+            hit = match_patterns(self.patterns, message.content)
+        else:
+            ok, hit = await self.pool.run(match_patterns, self.patterns, message.content)
+            if not ok:
+                return None  # pool busy or too slow; cheaper rules already ran
+        if hit is None:
+            return None
+        return Verdict(
+            "regex_delete",
+            f"🧩 Deleted message matching a filter pattern from {message.author.mention} "
+            f"in {message.channel.mention}.",
+            reason=hit,
+        )
+
+
+class AttachmentHashRule(Rule):
+    """Attachments whose sha256 is on the guild's blocklist."""
+
+    name = "attachments"
+    cost = 80
+
+    def __init__(self, blocklist: GuildListCache[frozenset], max_bytes: int):
+        self.blocklist = blocklist
+        self.max_bytes = max_bytes
+
+    async def check(self, message: discord.Message) -> Optional[Verdict]:
+        if not message.attachments:
+            return None
+        assert message.guild is not None
+        blocked = self.blocklist.get(message.guild.id)
+        if not blocked:
+            return None
+        for attachment in message.attachments:
+            if attachment.size > self.max_bytes:
+                continue
+            try:
+                data = await attachment.read()
+            except discord.HTTPException:
+                continue
+            digest = await asyncio.to_thread(sha256_hex, data)
+            if digest in blocked:
+                return Verdict(
+                    "attachment_delete",
+                    f"📎 Deleted blocked attachment from {message.author.mention} "
+                    f"in {message.channel.mention}.",
+                    reason=f"{attachment.filename} sha256={digest}",
+                )
+        return None
+
+
+class SpamRule(Rule):
+    name = "spam"
+    # cheap, but stateful: kept last so it only counts messages that
+    # passed every content filter
+    cost = 1000
+
+    def __init__(self, tracker: SpamTracker):
+        self.tracker = tracker
+
+    async def check(self, message: discord.Message) -> Optional[Verdict]:
+        if self.tracker.hit(message.author.id, time.time()) <= SPAM_MAX_MSG:
+            return None
+        return Verdict(
+            "spam_mute",
+            f"🔇 Auto-muted {message.author.mention} for spam in {message.channel.mention}.",
+            delete=False,
+            mute=True,
+        )
 
 
 # ---------- CAPTCHA VIEW ----------
 
+def captcha_options(code: str) -> list[str]:
+    # 3 button labels, one is correct
+    options = {code}
+    while len(options) < 3:
+        options.add(str(random.randint(1000, 9999)))
+    labels = list(options)
+    random.shuffle(labels)
+    return labels
+
+
 class CaptchaView(discord.ui.View):
-    def __init__(self, cog: "AutoModCog", member: discord.Member, code: int):
-        super().__init__(timeout=CAPTCHA_EXPIRE_SECONDS)
+    # persistent (no timeout): expiry is handled by the cog's sweeper so
+    # the view can be re-registered after a restart
+    def __init__(self, cog: "AutoModCog", entry: PendingCaptcha):
+        super().__init__(timeout=None)
         self.cog = cog
-        self.member = member
-        self.correct_code = str(code)
+        self.guild_id = entry.guild_id
+        self.user_id = entry.user_id
+        self.correct_code = entry.code
 
-        # create 3 buttons, one is correct
-        options = {self.correct_code}
-        while len(options) < 3:
-            options.add(str(random.randint(1000, 9999)))
-        labels = list(options)
-        random.shuffle(labels)
-
-        for label in labels:
+        for label in entry.options:
             self.add_item(CaptchaButton(label, self))
 
-    async def on_timeout(self):
-        # if still pending, mark as expired (no extra action needed here;
-        # cog can clean when needed)
-        pass
-
 
 class CaptchaButton(discord.ui.Button):
     def __init__(self, label: str, view: CaptchaView):
-        super().__init__(label=label, style=discord.ButtonStyle.primary)
+        super().__init__(
+            label=label,
+            style=discord.ButtonStyle.primary,
+            custom_id=f"captcha:{view.guild_id}:{view.user_id}:{label}",
+        )
         self.cog_view = view
 
     async def callback(self, interaction: discord.Interaction):
-        if interaction.user.id != self.cog_view.member.id:
+        if interaction.user.id != self.cog_view.user_id:
             await interaction.response.send_message(
                 "This verification is not for you.", ephemeral=True
             )
             return
 
+        # works for both the verification channel and DMs
+        guild = self.cog_view.cog.bot.get_guild(self.cog_view.guild_id)
+        member = guild.get_member(self.cog_view.user_id) if guild else None
+        if member is None:
+            await interaction.response.send_message(
+                "❌ You are no longer in that server.", ephemeral=True
+            )
+            return
+
         if self.label == self.cog_view.correct_code:
-            await self.cog_view.cog.captcha_success(self.cog_view.member, interaction)
+            await self.cog_view.cog.captcha_success(member, interaction)
         else:
             await interaction.response.send_message(
                 "❌ Wrong code. Try again.", ephemeral=True
@@ -97,27 +326,107 @@ class CaptchaButton(discord.ui.Button):
 class AutoModCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        # spam tracking: user_id -> timestamps
-        self.msg_history: Dict[int, list[float]] = defaultdict(list)
-        # join tracking: timestamps
-        self.join_times: list[float] = []
-        # firewall state
-        self.firewall_enabled: bool = False
-        self.last_raid_time: float = 0.0
-        # captcha pending: user_id -> (code, timestamp)
-        self.pending_captcha: Dict[int, Tuple[str, float]] = {}
+        # spam tracking: bounded per-user timestamp windows
+        self.spam_tracker = SpamTracker(
+            SPAM_WINDOW, SPAM_MAX_MSG, max_users=SPAM_MAX_TRACKED_USERS
+        )
+        # cross-user near-duplicate index (coordinated raid payloads)
+        self.dupes = DuplicateDetector(
+            window=DUPE_WINDOW,
+            min_users=DUPE_MIN_USERS,
+            max_distance=DUPE_MAX_DISTANCE,
+            min_length=DUPE_MIN_LENGTH,
+        )
+        # per-guild join tracking + firewall state
+        self.raid = RaidStates()
+        # guilds currently under a server-wide lockdown
+        self.locked_guilds: set[int] = set()
+        # guilds whose quarantine role overwrites are in place
+        self._quarantine_ready: set[int] = set()
+        self._quarantine_locks: dict[int, asyncio.Lock] = {}
+        # guild -> monotonic time before which a missing role is not retried
+        self._quarantine_retry_at: dict[int, float] = {}
+        # pending captchas (persisted; created in cog_load once the db is up)
+        self.captchas: Optional[CaptchaStore] = None
+        self._captcha_views: dict[tuple[int, int], CaptchaView] = {}
+        # log channel sender (merges bursts into digests)
+        self.log_sink = LogChannelSink(
+            LOG_CHANNEL_ID, window=LOG_DIGEST_WINDOW, burst=LOG_CHANNEL_BURST
+        )
+        # compiled bad-word matchers (shared global list + per-guild extras)
+        self.word_filters = WordLists(
+            BADWORDS_DIR, defaults=BAD_WORDS, word_boundary=BADWORD_WORD_BOUNDARY
+        )
+        # per-guild domain allow/block lists for the link scanner
+        self.link_allow = DomainLists(LINK_ALLOWLIST_DIR)
+        self.link_block = DomainLists(LINK_BLOCKLIST_DIR)
+        self.attachment_block: GuildListCache[frozenset] = GuildListCache(
+            ATTACHMENT_BLOCKLIST_DIR,
+            build=lambda hashes: frozenset(h.lower() for h in hashes),
+        )
+        # process pool for the CPU-heavy rules
+        self.pool = OffloadPool(
+            AUTOMOD_POOL_WORKERS, AUTOMOD_POOL_MAX_PENDING, AUTOMOD_POOL_TIMEOUT
+        )
+        # message checks, cheapest first
+        self.rules = RulePipeline(AUTOMOD_DISABLED_RULES, AUTOMOD_RULE_ORDER)
+        self.rules.register(InviteRule())
+        self.rules.register(BadWordRule(self.word_filters))
+        self.rules.register(LinkRule(self.link_allow, self.link_block))
+        self.rules.register(DuplicateRule(self.dupes, self.is_firewall_active))
+        self.rules.register(
+            RegexSetRule(AUTOMOD_REGEX_PATTERNS, self.pool, AUTOMOD_OFFLOAD_MIN_LENGTH)
+        )
+        self.rules.register(
+            AttachmentHashRule(self.attachment_block, ATTACHMENT_MAX_BYTES)
+        )
+        self.rules.register(SpamRule(self.spam_tracker))
 
         self.firewall_watchdog.start()
+        self.wordlist_reloader.start()
+        self.spam_sweeper.start()
 
-    def cog_unload(self):
+    async def cog_load(self):
+        # compile the shared lists now, off the event loop, rather than
+        # inside the first on_message that needs them
+        await asyncio.to_thread(self._load_shared_lists)
+        db = getattr(self.bot, "db", None)
+        if db is None:
+            return
+        self.captchas = CaptchaStore(db)
+        now = int(time.time())
+        # re-attach views so members mid-verification can still click
+        for entry in await self.captchas.load():
+            if entry.message_id and entry.expires_at > now:
+                view = CaptchaView(self, entry)
+                self._captcha_views[entry.key] = view
+                self.bot.add_view(view, message_id=entry.message_id)
+        self.captcha_sweeper.start()
+
+    async def cog_unload(self):
         self.firewall_watchdog.cancel()
+        self.wordlist_reloader.cancel()
+        self.spam_sweeper.cancel()
+        self.captcha_sweeper.cancel()
+        for view in self._captcha_views.values():
+            view.stop()
+        self.pool.shutdown()
+        await self.log_sink.close(self.bot.guilds)
+        modlog = getattr(self.bot, "modlog", None)
+        if modlog:
+            await modlog.flush()
 
     # ---------- LOG HELPERS ----------
 
-    async def log_channel(self, guild: discord.Guild, text: str):
-        chan = guild.get_channel(LOG_CHANNEL_ID)
-        if isinstance(chan, discord.TextChannel):
-            await chan.send(text)
+    async def log_channel(
+        self,
+        guild: discord.Guild,
+        text: str,
+        kind: str = "event",
+        priority: bool = False,
+    ):
+        # never blocks; routine entries may be merged into a digest
+        self.log_sink.post(guild, text, kind=kind, priority=priority)
 
     async def log_db(
         self,
@@ -127,83 +436,238 @@ class AutoModCog(commands.Cog):
         action: str,
         reason: str = "",
     ):
-        db = getattr(self.bot, "db", None)
-        if not db:
+        modlog = getattr(self.bot, "modlog", None)
+        if not modlog:
             return
-        ts = int(time.time())
-        await db.execute(
-            """
-            INSERT INTO moderation_logs (guild_id, user_id, actor_id, action, reason, created_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            (guild_id, user_id, actor_id, action, reason, ts),
-        )
-        await db.commit()
+        # queued; written in batches by the bot's ModLogWriter
+        modlog.add(guild_id, user_id, actor_id, action, reason)
 
     # ---------- FIREWALL / LOCKDOWN ----------
 
     async def enable_firewall(self, guild: discord.Guild, reason: str, actor_id: Optional[int] = None):
-        if self.firewall_enabled:
+        state = self.raid[guild.id]
+        if state.firewall_enabled:
             return
-        self.firewall_enabled = True
-        self.last_raid_time = time.time()
+        state.firewall_enabled = True
+        state.last_raid_time = time.time()
+        # prepare the quarantine role before the join wave hits it
+        await self.get_quarantine_role(guild)
         await self.log_channel(
             guild,
             f"🚨 Firewall mode **ENABLED** – new members will be CAPTCHA-verified.\nReason: {reason}",
+            priority=True,
         )
         await self.log_db(guild.id, None, actor_id, "firewall_on", reason)
 
     async def disable_firewall(self, guild: discord.Guild, actor_id: Optional[int] = None):
-        if not self.firewall_enabled:
+        state = self.raid[guild.id]
+        if not state.firewall_enabled:
             return
-        self.firewall_enabled = False
+        state.firewall_enabled = False
         await self.log_channel(
             guild,
             "✅ Firewall mode **DISABLED** – new members join normally again.",
+            priority=True,
         )
         await self.log_db(guild.id, None, actor_id, "firewall_off", "")
 
-    async def temporary_lockdown(self, guild: discord.Guild, actor_id: Optional[int], reason: str):
+    async def temporary_lockdown(
+        self,
+        guild: discord.Guild,
+        actor_id: Optional[int],
+        reason: str,
+        progress=None,
+    ) -> Optional[LockdownReport]:
+        db = getattr(self.bot, "db", None)
+        if not db or guild.id in self.locked_guilds:
+            return None
+        self.locked_guilds.add(guild.id)
+        if await has_snapshot(db, guild.id):
+            # already locked (e.g. before a restart); keep the original snapshot
+            return None
+
         await self.log_channel(
             guild,
             "🛑 **TEMPORARY LOCKDOWN** – most channels locked due to raid.",
+            priority=True,
         )
-        for ch in guild.text_channels:
+        report = await lock_guild(
+            db, guild, LOCKDOWN_CONCURRENCY, "Raid lockdown", progress
+        )
+        await self.log_channel(guild, f"🔒 {report.summary('Locked')}", priority=True)
+        await self.log_db(
+            guild.id, None, actor_id, "lockdown_on", f"{reason} | {report.summary('locked')}"
+        )
+        return report
+
+    async def lift_lockdown(
+        self,
+        guild: discord.Guild,
+        actor_id: Optional[int],
+        progress=None,
+    ) -> Optional[LockdownReport]:
+        db = getattr(self.bot, "db", None)
+        if not db:
+            return None
+        report = await restore_guild(
+            db, guild, LOCKDOWN_CONCURRENCY, "Lockdown lifted", progress
+        )
+        if not report.failed:
+            self.locked_guilds.discard(guild.id)
+        await self.log_channel(guild, f"🔓 {report.summary('Restored')}", priority=True)
+        await self.log_db(guild.id, None, actor_id, "lockdown_off", report.summary("restored"))
+        return report
+
+    def progress_reporter(self, message: discord.WebhookMessage, label: str):
+        """Edit `message` with job progress, at most every couple of seconds."""
+        last = 0.0
+
+        async def report(done: int, total: int):
+            nonlocal last
+            now = time.monotonic()
+            if done < total and now - last < 2:
+                return
+            last = now
             try:
-                overwrites = ch.overwrites_for(guild.default_role)
-                if overwrites.send_messages is not False:
-                    overwrites.send_messages = False
-                    await ch.set_permissions(
-                        guild.default_role,
-                        overwrite=overwrites,
-                        reason="Raid lockdown",
-                    )
-            except discord.Forbidden:
-                continue
-        await self.log_db(guild.id, None, actor_id, "lockdown_on", reason)
+                await message.edit(content=f"⏳ {label}: {done}/{total} channels")
+            except discord.HTTPException:
+                pass
+
+        return report
+
+    def is_firewall_active(self, guild_id: int) -> bool:
+        state = self.raid.get(guild_id)
+        return bool(state and state.firewall_enabled)
 
-    # auto-release firewall when calm (disabled if FIREWALL_AUTO_RELEASE_MINUTES <= 0)
+    # auto-release each guild's firewall once it has been calm long enough
+    # (per-guild auto_release_minutes; <= 0 disables)
     @tasks.loop(minutes=1)
     async def firewall_watchdog(self):
-        if not self.firewall_enabled or FIREWALL_AUTO_RELEASE_MINUTES <= 0:
-            return
         now = time.time()
-        if now - self.last_raid_time > FIREWALL_AUTO_RELEASE_MINUTES * 60:
-            for g in self.bot.guilds:
-                await self.disable_firewall(g)
+        for guild_id, state in list(self.raid.items()):
+            if not state.should_release(now):
+                continue
+            guild = self.bot.get_guild(guild_id)
+            if guild is not None:
+                await self.disable_firewall(guild)
 
     @firewall_watchdog.before_loop
     async def before_firewall_watchdog(self):
         await self.bot.wait_until_ready()
 
+    # hot-reload edited word / domain lists (structures are swapped in whole,
+    # so building them off the event loop is safe)
+    @tasks.loop(seconds=WORDLIST_RELOAD_SECONDS)
+    async def wordlist_reloader(self):
+        for name in await asyncio.to_thread(self.word_filters.reload_changed):
+            print(f"[AUTOMOD] Reloaded bad-word list: {name}")
+        for name in await asyncio.to_thread(self._reload_link_lists):
+            print(f"[AUTOMOD] Reloaded link lists: {name}")
+        for guild_id in await asyncio.to_thread(self.attachment_block.reload_changed):
+            print(f"[AUTOMOD] Reloaded attachment blocklist for guild {guild_id}")
+
+    def _load_shared_lists(self):
+        self.word_filters.shared.get()
+        self.link_allow.shared.get()
+        self.link_block.shared.get()
+
+    def _reload_link_lists(self) -> list[str]:
+        return self.link_allow.reload_changed() + self.link_block.reload_changed()
+
+    # forget users that went quiet so memory tracks active users only
+    @tasks.loop(seconds=SPAM_SWEEP_SECONDS)
+    async def spam_sweeper(self):
+        self.spam_tracker.sweep(time.time())
+
+    # ---------- QUARANTINE ROLE ----------
+
+    def find_quarantine_role(self, guild: discord.Guild) -> Optional[discord.Role]:
+        if QUARANTINE_ROLE_ID:
+            return guild.get_role(QUARANTINE_ROLE_ID)
+        return discord.utils.get(guild.roles, name=QUARANTINE_ROLE_NAME)
+
+    async def get_quarantine_role(self, guild: discord.Guild) -> Optional[discord.Role]:
+        """Return the quarantine role, setting up its overwrites on first use."""
+        role = self.find_quarantine_role(guild)
+        if role is not None and guild.id in self._quarantine_ready:
+            return role
+        # a raid's worth of joins must not retry (and report) the failure each
+        if role is None and time.monotonic() < self._quarantine_retry_at.get(guild.id, 0.0):
+            return None
+
+        async with self._quarantine_locks.setdefault(guild.id, asyncio.Lock()):
+            # another join may have created it while we waited
+            role = self.find_quarantine_role(guild)
+            if role is None and time.monotonic() < self._quarantine_retry_at.get(guild.id, 0.0):
+                return None
+            if role is None and not QUARANTINE_ROLE_ID:
+                try:
+                    role = await guild.create_role(
+                        name=QUARANTINE_ROLE_NAME,
+                        reason="Firewall quarantine role",
+                    )
+                except discord.HTTPException:
+                    role = None
+            if role is None:
+                self._quarantine_retry_at[guild.id] = time.monotonic() + QUARANTINE_RETRY_SECONDS
+                await self.log_channel(
+                    guild,
+                    "⚠️ Quarantine role missing and could not be created – "
+                    f"new members cannot be restricted (retrying in {QUARANTINE_RETRY_SECONDS}s).",
+                    kind="quarantine_missing",
+                )
+                return None
+            self._quarantine_retry_at.pop(guild.id, None)
+            if guild.id not in self._quarantine_ready:
+                report = await run_channel_jobs(
+                    guild.text_channels,
+                    lambda ch: self.apply_quarantine_overwrite(ch, role),
+                    LOCKDOWN_CONCURRENCY,
+                )
+                if report.failed:
+                    await self.log_channel(
+                        guild,
+                        f"⚠️ Quarantine role: {report.summary('set up')}.",
+                        priority=True,
+                    )
+                self._quarantine_ready.add(guild.id)
+        return role
+
+    async def apply_quarantine_overwrite(self, channel: discord.TextChannel, role: discord.Role) -> bool:
+        overwrite = channel.overwrites_for(role)
+        if overwrite.send_messages is False and overwrite.add_reactions is False:
+            return False
+        overwrite.send_messages = False
+        overwrite.add_reactions = False
+        await channel.set_permissions(
+            role, overwrite=overwrite, reason="Firewall quarantine role"
+        )
+        return True
+
+    async def get_autorole(self, guild: discord.Guild) -> Optional[discord.Role]:
+        settings = getattr(self.bot, "settings", None)
+        row = await settings.get(guild.id) if settings is not None else None
+        autorole_id = (row or {}).get("autorole_id")
+        return guild.get_role(autorole_id) if autorole_id else None
+
     # ---------- CAPTCHA FLOW ----------
 
     async def start_captcha(self, member: discord.Member):
         guild = member.guild
         code = str(random.randint(1000, 9999))
-        self.pending_captcha[member.id] = (code, time.time())
+        now = int(time.time())
+        entry = PendingCaptcha(
+            guild_id=guild.id,
+            user_id=member.id,
+            code=code,
+            options=captcha_options(code),
+            channel_id=None,
+            message_id=None,
+            created_at=now,
+            expires_at=now + CAPTCHA_EXPIRE_SECONDS,
+        )
 
-        view = CaptchaView(self, member, int(code))
+        view = CaptchaView(self, entry)
 
         msg_text = (
             f"{member.mention}, firewall mode is active.\n"
@@ -212,52 +676,126 @@ class AutoModCog(commands.Cog):
         )
 
         # Prefer verification channel
+        msg: Optional[discord.Message] = None
         verification_channel = guild.get_channel(VERIFICATION_CHANNEL_ID)
         if isinstance(verification_channel, discord.TextChannel):
-            await verification_channel.send(msg_text, view=view)
+            msg = await verification_channel.send(msg_text, view=view)
         else:
             try:
-                await member.send(msg_text, view=view)
+                msg = await member.send(msg_text, view=view)
             except discord.Forbidden:
                 await self.log_channel(
                     guild,
                     f"⚠️ Could not DM verification to {member} (DMs closed). Ask them to enable DMs.",
+                    kind="captcha_dm_failed",
                 )
 
+        if msg is not None:
+            entry.channel_id = msg.channel.id
+            entry.message_id = msg.id
+        old = self._captcha_views.pop(entry.key, None)
+        if old is not None:
+            old.stop()
+        self._captcha_views[entry.key] = view
+        if self.captchas is not None:
+            await self.captchas.add(entry)
+
         await self.log_db(guild.id, member.id, None, "captcha_start", "")
 
+    async def delete_captcha_message(self, entry: PendingCaptcha):
+        if not entry.channel_id or not entry.message_id:
+            return
+        channel = self.bot.get_partial_messageable(entry.channel_id)
+        try:
+            await channel.get_partial_message(entry.message_id).delete()
+        except discord.HTTPException:
+            pass
+
+    # expire abandoned / failed captchas and remove their messages
+    @tasks.loop(seconds=CAPTCHA_SWEEP_SECONDS)
+    async def captcha_sweeper(self):
+        if self.captchas is None:
+            return
+        for entry in await self.captchas.pop_expired(int(time.time())):
+            view = self._captcha_views.pop(entry.key, None)
+            if view is not None:
+                view.stop()
+            await self.delete_captcha_message(entry)
+            guild = self.bot.get_guild(entry.guild_id)
+            member = guild.get_member(entry.user_id) if guild is not None else None
+            if member is None:
+                continue  # left meanwhile
+            outcome = await self.handle_expired_captcha(member)
+            await self.log_channel(
+                guild,
+                f"⌛ CAPTCHA for {member.mention} expired without an answer ({outcome}).",
+                kind="captcha_expire",
+            )
+            await self.log_db(entry.guild_id, entry.user_id, None, "captcha_expire", outcome)
+
+    async def handle_expired_captcha(self, member: discord.Member) -> str:
+        """Apply CAPTCHA_EXPIRE_ACTION; returns what was done."""
+        if CAPTCHA_EXPIRE_ACTION == "reissue":
+            await self.start_captcha(member)
+            return "new CAPTCHA sent"
+        if CAPTCHA_EXPIRE_ACTION == "release":
+            quarantine = self.find_quarantine_role(member.guild)
+            autorole = await self.get_autorole(member.guild)
+            roles = [r for r in member.roles if not r.is_default() and r != quarantine]
+            if autorole and autorole not in roles:
+                roles.append(autorole)
+            try:
+                await member.edit(roles=roles, reason="CAPTCHA expired, quarantine lifted")
+            except discord.HTTPException:
+                return "could not lift quarantine"
+            return "quarantine lifted"
+        try:
+            await member.kick(reason="CAPTCHA not answered in time")
+        except discord.HTTPException:
+            return "kick failed"
+        return "kicked"
+
+    @captcha_sweeper.before_loop
+    async def before_captcha_sweeper(self):
+        await self.bot.wait_until_ready()
+
     async def captcha_success(self, member: discord.Member, interaction: discord.Interaction):
         guild = member.guild
         # remove from pending
-        self.pending_captcha.pop(member.id, None)
+        if self.captchas is not None:
+            await self.captchas.remove(guild.id, member.id)
+        view = self._captcha_views.pop((guild.id, member.id), None)
+        if view is not None:
+            view.stop()
 
         # delete the verification message with buttons
         try:
             if interaction.message:
                 await interaction.message.delete()
-        except discord.Forbidden:
+        except discord.HTTPException:
             pass
 
-        # remove channel overrides that blocked sending (if any)
-        for ch in guild.text_channels:
+        # swap quarantine -> verified (+ the autorole held back while the
+        # firewall was up) in a single member edit
+        quarantine = self.find_quarantine_role(guild)
+        verified = guild.get_role(VERIFIED_ROLE_ID) if VERIFIED_ROLE_ID else None
+        autorole = await self.get_autorole(guild)
+        roles = [r for r in member.roles if not r.is_default() and r != quarantine]
+        for role in (verified, autorole):
+            if role and role not in roles:
+                roles.append(role)
+        if roles != [r for r in member.roles if not r.is_default()]:
             try:
-                await ch.set_permissions(member, overwrite=None, reason="Captcha passed")
+                await member.edit(roles=roles, reason="Captcha passed")
             except discord.Forbidden:
-                continue
-
-        # assign verified role
-        if VERIFIED_ROLE_ID:
-            role = guild.get_role(VERIFIED_ROLE_ID)
-            if role:
-                try:
-                    await member.add_roles(role, reason="Captcha passed")
-                except discord.Forbidden:
-                    pass
+                pass
 
         await interaction.response.send_message(
             "✅ Verification complete. Welcome to the server.", ephemeral=True
         )
-        await self.log_channel(guild, f"✅ {member.mention} passed CAPTCHA verification.")
+        await self.log_channel(
+            guild, f"✅ {member.mention} passed CAPTCHA verification.", kind="captcha_pass"
+        )
         await self.log_db(guild.id, member.id, interaction.user.id, "captcha_pass", "")
 
     # ---------- LISTENERS ----------
@@ -270,47 +808,85 @@ class AutoModCog(commands.Cog):
         guild = member.guild
         now = time.time()
 
-        # track joins for raid detection
-        self.join_times.append(now)
-        self.join_times = [t for t in self.join_times if now - t <= RAID_JOIN_WINDOW]
+        # track joins for raid detection (this guild only)
+        state = self.raid[guild.id]
+        join_count = state.joins.hit(now)
 
         await self.log_db(guild.id, member.id, None, "join", "")
 
         # RAID detection
-        join_count = len(self.join_times)
-        if join_count >= RAID_JOIN_THRESHOLD:
+        if join_count >= state.join_threshold:
+            # still raiding: push the auto-release back
+            state.last_raid_time = now
             await self.enable_firewall(
                 guild,
-                f"{join_count} joins in {RAID_JOIN_WINDOW}s (auto)",
+                f"{join_count} joins in {state.join_window}s (auto)",
                 None,
             )
 
-        if join_count >= LOCKDOWN_HARD_THRESHOLD:
+        if join_count >= state.lockdown_threshold:
             await self.temporary_lockdown(
                 guild,
                 None,
-                f"{join_count} joins in {RAID_JOIN_WINDOW}s (auto lockdown)",
+                f"{join_count} joins in {state.join_window}s (auto lockdown)",
             )
 
-        # If firewall active, apply CAPTCHA for this member
-        if self.firewall_enabled:
-            # block sending everywhere via overrides
-            for ch in guild.text_channels:
+        # If firewall active, quarantine and CAPTCHA this member. WelcomeCog
+        # holds the autorole back meanwhile: an allow overwrite on it would
+        # beat the quarantine deny, so the edit sets the full role list.
+        if state.firewall_enabled:
+            role = await self.get_quarantine_role(guild)
+            if role:
+                autorole = await self.get_autorole(guild)
+                roles = [r for r in member.roles if not r.is_default() and r != autorole]
+                if role not in roles:
+                    roles.append(role)
                 try:
-                    await ch.set_permissions(
-                        member,
-                        send_messages=False,
-                        add_reactions=False,
-                        reason="Firewall verification",
-                    )
+                    await member.edit(roles=roles, reason="Firewall verification")
                 except discord.Forbidden:
-                    continue
+                    pass
             await self.start_captcha(member)
 
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
+        # keep new channels closed to quarantined members
+        if not isinstance(channel, discord.TextChannel):
+            return
+        if channel.guild.id not in self._quarantine_ready:
+            return
+        role = await self.get_quarantine_role(channel.guild)
+        if role:
+            try:
+                await self.apply_quarantine_overwrite(channel, role)
+            except discord.HTTPException:
+                pass
+
+    # where a quarantine role already exists, set its overwrites up ahead of
+    # any raid so the first raid join does not wait on them. Roles are only
+    # ever created when the firewall is first turned on.
+    @commands.Cog.listener()
+    async def on_ready(self):
+        for guild in self.bot.guilds:
+            if self.find_quarantine_role(guild) is not None:
+                await self.get_quarantine_role(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        if self.find_quarantine_role(guild) is not None:
+            await self.get_quarantine_role(guild)
+
     @commands.Cog.listener()
     async def on_member_remove(self, member: discord.Member):
         if member.bot or not member.guild:
             return
+        # drop a CAPTCHA they will never answer now
+        if self.captchas is not None:
+            entry = await self.captchas.remove(member.guild.id, member.id)
+            if entry is not None:
+                view = self._captcha_views.pop(entry.key, None)
+                if view is not None:
+                    view.stop()
+                await self.delete_captcha_message(entry)
         await self.log_db(member.guild.id, member.id, None, "leave", "")
 
     @commands.Cog.listener()
@@ -319,45 +895,33 @@ class AutoModCog(commands.Cog):
             return
 
         member = message.author
-        guild = message.guild
+        if isinstance(member, discord.Member) and self.bot.perms.is_staff(member):
+            return  # ignore staff (cached per member)
 
-        if isinstance(member, discord.Member) and is_admin_member(member):
-            return  # ignore staff
-
-        content_lower = message.content.lower()
-
-        # Bad words
-        if any(bad in content_lower for bad in BAD_WORDS):
-            try:
-                await message.delete()
-            except discord.Forbidden:
-                pass
-            await self.log_channel(
-                guild,
-                f"🧱 Deleted bad-word message from {member.mention} in {message.channel.mention}.",
-            )
-            await self.log_db(guild.id, member.id, None, "badword_delete", "")
+        result = await self.rules.run(message)
+        if result is None:
             return
+        _, verdict = result
+        await self.apply_verdict(message, verdict)
+
+    async def apply_verdict(self, message: discord.Message, verdict: Verdict):
+        guild = message.guild
+        member = message.author
+        assert guild is not None
 
-        # Anti-link (Discord invites)
-        if INVITE_RE.search(message.content):
+        if verdict.delete:
             try:
                 await message.delete()
             except discord.Forbidden:
                 pass
-            await self.log_channel(
-                guild,
-                f"⛔ Deleted invite link from {member.mention} in {message.channel.mention}.",
-            )
-            await self.log_db(guild.id, member.id, None, "invite_delete", "")
-            return
-
-        # Anti-spam
-        now = time.time()
-        hist = self.msg_history[member.id]
-        hist.append(now)
-        self.msg_history[member.id] = [t for t in hist if now - t <= SPAM_WINDOW]
-        if len(self.msg_history[member.id]) > SPAM_MAX_MSG:
+        for channel_id, message_id in verdict.extra_deletes:
+            channel = guild.get_channel(channel_id)
+            if isinstance(channel, discord.TextChannel):
+                try:
+                    await channel.get_partial_message(message_id).delete()
+                except discord.HTTPException:
+                    pass
+        if verdict.mute:
             try:
                 await message.channel.set_permissions(
                     member,
@@ -366,11 +930,9 @@ class AutoModCog(commands.Cog):
                 )
             except discord.Forbidden:
                 pass
-            await self.log_channel(
-                guild,
-                f"🔇 Auto-muted {member.mention} for spam in {message.channel.mention}.",
-            )
-            await self.log_db(guild.id, member.id, None, "spam_mute", "")
+
+        await self.log_channel(guild, verdict.log_text, kind=verdict.action)
+        await self.log_db(guild.id, member.id, None, verdict.action, verdict.reason)
 
     # ---------- ADMIN SLASH COMMANDS ----------
 
@@ -378,7 +940,7 @@ class AutoModCog(commands.Cog):
         name="firewall",
         description="Manage raid firewall mode (auto-raid protection).",
     )
-    @admin_check()
+    @is_admin()
     @app_commands.describe(mode="on/off/status")
     async def firewall(
         self,
@@ -398,10 +960,21 @@ class AutoModCog(commands.Cog):
             await self.disable_firewall(guild, interaction.user.id)
             await interaction.response.send_message("✅ Firewall disabled.", ephemeral=True)
         elif mode == "status":
-            status = "ENABLED" if self.firewall_enabled else "DISABLED"
+            state = self.raid[guild.id]
+            now = time.time()
+            status = "ENABLED" if state.firewall_enabled else "DISABLED"
+            release = (
+                f"{state.auto_release_minutes} min after the last raid join"
+                if state.auto_release_minutes > 0
+                else "manual only"
+            )
             await interaction.response.send_message(
                 f"Firewall status: **{status}**\n"
-                f"Recent joins in {RAID_JOIN_WINDOW}s: {len(self.join_times)}",
+                f"Recent joins in {state.join_window}s: {state.joins.count(now)} "
+                f"(~{state.joins_per_minute(now):.1f}/min)\n"
+                f"Thresholds: firewall at {state.join_threshold}, "
+                f"lockdown at {state.lockdown_threshold}\n"
+                f"Auto-release: {release}",
                 ephemeral=True,
             )
         else:
@@ -409,6 +982,67 @@ class AutoModCog(commands.Cog):
                 "Usage: `/firewall mode:on|off|status`", ephemeral=True
             )
 
+    @app_commands.command(
+        name="automod_stats",
+        description="Show auto-moderation memory and tracking stats.",
+    )
+    @is_admin()
+    async def automod_stats(self, interaction: discord.Interaction):
+        tracker = self.spam_tracker
+        await interaction.response.send_message(
+            f"Spam tracker: **{len(tracker)}** users tracked "
+            f"(cap {tracker.max_users}, {tracker.evicted} evicted)\n"
+            f"Memory estimate: ~{tracker.memory_estimate() / 1024:.1f} KiB\n"
+            f"Log channel: {self.log_sink.sent} sent, {self.log_sink.merged} entries "
+            f"merged into {self.log_sink.digests} digests\n"
+            f"Process pool: {self.pool.summary()}\n"
+            f"Rules:\n```" + "\n".join(self.rules.report()) + "```",
+            ephemeral=True,
+        )
+
+    @app_commands.command(
+        name="server_lockdown",
+        description="Lock every text channel, or restore them from the saved snapshot.",
+    )
+    @is_admin()
+    @app_commands.describe(mode="lock/unlock")
+    async def server_lockdown(self, interaction: discord.Interaction, mode: str):
+        guild = interaction.guild
+        if guild is None:
+            await interaction.response.send_message("Guild not found.", ephemeral=True)
+            return
+
+        mode = mode.lower()
+        if mode not in ("lock", "unlock"):
+            await interaction.response.send_message(
+                "Usage: `/server_lockdown mode:lock|unlock`", ephemeral=True
+            )
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        status = await interaction.followup.send("⏳ Starting...", ephemeral=True, wait=True)
+
+        if mode == "lock":
+            report = await self.temporary_lockdown(
+                guild,
+                interaction.user.id,
+                "Manual lockdown",
+                progress=self.progress_reporter(status, "Locking"),
+            )
+            text = (
+                f"🔒 {report.summary('Locked')}"
+                if report
+                else "ℹ Server is already locked down. Use `mode:unlock` first."
+            )
+        else:
+            report = await self.lift_lockdown(
+                guild,
+                interaction.user.id,
+                progress=self.progress_reporter(status, "Restoring"),
+            )
+            text = f"🔓 {report.summary('Restored')}" if report else "❌ Database unavailable."
+        await status.edit(content=text)
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(AutoModCog(bot))
@@ -26,8 +26,9 @@ class HelpCog(commands.Cog):
             name="🛡️ Admin & Moderation (Slash)",
             value=(
                 "**/announce** `<message> [channel]` – Broadcast announcement\n"
-                "**/schedule_announce** – Schedule an announcement\n"
-                "**/clear** `<amount>` – Clear messages\n"
+                "**/schedule_announce** – Schedule a one-off or repeating announcement\n"
+                "**/schedule_list** / **/schedule_cancel** `<id>` – Manage scheduled announcements\n"
+                "**/clear** `<amount> [user] [contains] [...]` – Clear messages, with filters\n"
                 "**/slowmode** `<seconds>` – Set channel slowmode\n"
                 "**/lockdown** – Lock channel\n"
                 "**/backup_now** – Run channel/message backup\n"
@@ -35,7 +36,8 @@ class HelpCog(commands.Cog):
                 "**/ban** `<user> [reason]` – Ban member\n"
                 "**/mute** `<user> <minutes> [reason]` – Timeout user\n"
                 "**/unmute** `<user>` – Remove timeout\n"
-                "**/logs** `[limit]` – View moderation logs"
+                "**/logs** `[limit] [user] [actor] [action] [newer/older_than_hours]` – "
+                "Browse moderation logs (Newer/Older buttons page through)"
             ),
             inline=False,
         )
@@ -46,7 +48,8 @@ class HelpCog(commands.Cog):
             value=(
                 "**/welcome_set_channel** `<#channel>` – Set welcome channel\n"
                 "**/welcome_set_message** `<template>` – Set welcome text\n"
-                "**/welcome_set_autorole** `<@role>` – Set auto-role for new members"
+                "**/welcome_set_autorole** `<@role>` – Set auto-role for new members\n"
+                "**/welcome_stats** – Welcome post / DM counters"
             ),
             inline=False,
         )
@@ -4,20 +4,7 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 
-from config import ADMIN_ROLE_IDS
-
-
-def is_admin():
-    async def predicate(interaction: discord.Interaction):
-        member = interaction.user
-        if isinstance(member, discord.Member):
-            if member.guild_permissions.administrator:
-                return True
-            if any(r.id in ADMIN_ROLE_IDS for r in member.roles):
-                return True
-        await interaction.response.send_message("❌ Admin only.", ephemeral=True)
-        raise app_commands.CheckFailure("Not admin")
-    return app_commands.check(predicate)
+from utils.permissions import is_admin
 
 
 class RoleButton(discord.ui.Button):
@@ -8,13 +8,7 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 
-from config import ADMIN_ROLE_IDS, LOG_CHANNEL_ID
-
-
-def is_staff(member: discord.Member) -> bool:
-    if member.guild_permissions.administrator:
-        return True
-    return any(r.id in ADMIN_ROLE_IDS for r in member.roles)
+from config import LOG_CHANNEL_ID
 
 
 async def close_ticket_with_transcript(channel: discord.TextChannel):
@@ -56,7 +50,7 @@ class TicketView(discord.ui.View):
         if not isinstance(interaction.user, discord.Member):
             return
 
-        if not is_staff(interaction.user):
+        if not interaction.client.perms.is_staff(interaction.user):  # type: ignore
             await interaction.response.send_message(
                 "❌ Only staff can close tickets.", ephemeral=True
             )
@@ -1,5 +1,7 @@
 # cogs/welcome.py
 
+from typing import Dict
+
 import discord
 from discord.ext import commands
 from discord import app_commands
@@ -8,51 +10,45 @@ from config import (
     GUILD_ID,
     RULES_CHANNEL_ID,
     WELCOME_CHANNEL_ID,
-    ADMIN_ROLE_IDS,
     VERIFICATION_CHANNEL_ID,   # NEW
+    WELCOME_BATCH_RATE,
+    WELCOME_BATCH_WINDOW,
+    WELCOME_BATCH_MENTIONS,
+    WELCOME_DM_PER_SECOND,
+    WELCOME_DM_QUEUE_MAX,
 )
+from utils.permissions import is_admin
+from utils.welcome_dispatch import WelcomeDispatcher
+from utils.welcome_render import DEFAULT_TEMPLATE, WelcomeRenderer, WelcomeTemplate
 
 
-def is_admin():
-    async def predicate(interaction: discord.Interaction):
-        member = interaction.user
-        if isinstance(member, discord.Member):
-            if member.guild_permissions.administrator:
-                return True
-            if any(r.id in ADMIN_ROLE_IDS for r in member.roles):
-                return True
-        await interaction.response.send_message(
-            "❌ Admin only.", ephemeral=True
+class WelcomeCog(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._renderers: Dict[int, WelcomeRenderer] = {}
+        self.dispatcher = WelcomeDispatcher(
+            batch_rate=WELCOME_BATCH_RATE,
+            window=WELCOME_BATCH_WINDOW,
+            max_mentions=WELCOME_BATCH_MENTIONS,
+            dm_per_second=WELCOME_DM_PER_SECOND,
+            dm_queue_max=WELCOME_DM_QUEUE_MAX,
+            is_paused=self.firewall_active,
         )
-        raise app_commands.CheckFailure("Not admin")
 
-    return app_commands.check(predicate)
+    async def cog_load(self):
+        self.dispatcher.start()
 
+    async def cog_unload(self):
+        await self.dispatcher.close()
 
-class WelcomeCog(commands.Cog):
-    def __init__(self, bot: commands.Bot):
-        self.bot = bot
+    def firewall_active(self, guild_id: int) -> bool:
+        automod = self.bot.get_cog("AutoModCog")
+        return bool(automod and automod.is_firewall_active(guild_id))  # type: ignore[attr-defined]
 
-    # ---------- DB helpers ----------
+    # ---------- settings (cached by bot.settings) ----------
 
     async def get_settings(self, guild_id: int):
-        assert self.bot.db is not None
-        cur = await self.bot.db.execute(
-            """
-            SELECT welcome_channel_id, welcome_message, autorole_id, default_announce_id
-            FROM guild_settings WHERE guild_id = ?
-            """,
-            (guild_id,),
-        )
-        row = await cur.fetchone()
-        if row is None:
-            return None
-        return {
-            "welcome_channel_id": row[0],
-            "welcome_message": row[1],
-            "autorole_id": row[2],
-            "default_announce_id": row[3],
-        }
+        return await self.bot.settings.get(guild_id)  # type: ignore
 
     async def upsert_settings(
         self,
@@ -62,42 +58,37 @@ class WelcomeCog(commands.Cog):
         autorole_id: int | None = None,
         default_announce_id: int | None = None,
     ):
-        assert self.bot.db is not None
-        current = await self.get_settings(guild_id) or {
-            "welcome_channel_id": None,
-            "welcome_message": None,
-            "autorole_id": None,
-            "default_announce_id": None,
-        }
+        # write-through: the cached row is updated along with the DB
+        await self.bot.settings.upsert(  # type: ignore
+            guild_id,
+            welcome_channel_id=welcome_channel_id,
+            welcome_message=welcome_message,
+            autorole_id=autorole_id,
+            default_announce_id=default_announce_id,
+        )
 
-        if welcome_channel_id is not None:
-            current["welcome_channel_id"] = welcome_channel_id
-        if welcome_message is not None:
-            current["welcome_message"] = welcome_message
-        if autorole_id is not None:
-            current["autorole_id"] = autorole_id
-        if default_announce_id is not None:
-            current["default_announce_id"] = default_announce_id
+    # ---------- welcome rendering ----------
 
-        await self.bot.db.execute(
-            """
-            INSERT INTO guild_settings (guild_id, welcome_channel_id, welcome_message, autorole_id, default_announce_id)
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT(guild_id) DO UPDATE SET
-              welcome_channel_id = excluded.welcome_channel_id,
-              welcome_message    = excluded.welcome_message,
-              autorole_id        = excluded.autorole_id,
-              default_announce_id= excluded.default_announce_id
-            """,
-            (
-                guild_id,
-                current["welcome_channel_id"],
-                current["welcome_message"],
-                current["autorole_id"],
-                current["default_announce_id"],
-            ),
+    def get_renderer(self, guild: discord.Guild, template: str) -> WelcomeRenderer:
+        """Compiled template + embed skeleton, rebuilt only when an input changes."""
+        rules_channel = guild.get_channel(RULES_CHANNEL_ID) if RULES_CHANNEL_ID else None
+        verification_channel = (
+            guild.get_channel(VERIFICATION_CHANNEL_ID)
+            if VERIFICATION_CHANNEL_ID
+            else None
         )
-        await self.bot.db.commit()
+        renderer = self._renderers.get(guild.id)
+        key = WelcomeRenderer.make_key(guild, template, rules_channel, verification_channel)
+        if renderer is None or renderer.key != key:
+            try:
+                renderer = WelcomeRenderer(guild, template, rules_channel, verification_channel)
+            except ValueError as e:
+                # stored template is malformed (e.g. written by the dashboard)
+                print(f"[WELCOME] Bad template for guild {guild.id}: {e}")
+                renderer = WelcomeRenderer(guild, DEFAULT_TEMPLATE, rules_channel, verification_channel)
+                renderer.key = key
+            self._renderers[guild.id] = renderer
+        return renderer
 
     # ---------- event: on_member_join ----------
 
@@ -106,82 +97,30 @@ class WelcomeCog(commands.Cog):
         guild = member.guild
         settings = await self.get_settings(guild.id) or {}
 
-        rules_channel = guild.get_channel(RULES_CHANNEL_ID) if RULES_CHANNEL_ID else None
-        verification_channel = (
-            guild.get_channel(VERIFICATION_CHANNEL_ID)
-            if VERIFICATION_CHANNEL_ID
-            else None
-        )
-
         welcome_channel_id = settings.get("welcome_channel_id") or WELCOME_CHANNEL_ID
         welcome_channel = (
             guild.get_channel(welcome_channel_id) if welcome_channel_id else None
         )
 
-        welcome_message = settings.get("welcome_message") or (
-            "{mention}, welcome to **{server}**.\n"
-            "You are now entering a monitored cyber operations zone."
-        )
+        renderer = self.get_renderer(guild, settings.get("welcome_message") or DEFAULT_TEMPLATE)
+        embed = renderer.embed_for(member)
 
-        description = welcome_message.format(
-            mention=member.mention,
-            server=guild.name,
+        # ----- DM to user (queued; skipped during raids) -----
+        self.dispatcher.dm(
+            member,
+            content=f"Welcome to **{guild.name}**, {member.display_name}. 🛰",
+            embed=embed,
+            view=renderer.dm_view,
         )
 
-        embed = discord.Embed(
-            title="🚨 New Operative Connected",
-            description=description,
-            color=discord.Color.red(),
-        )
-
-        if member.avatar:
-            embed.set_thumbnail(url=member.avatar.url)
-        elif guild.icon:
-            embed.set_thumbnail(url=guild.icon.url)
-
-        if rules_channel:
-            embed.add_field(
-                name="📜 Briefing",
-                value=f"Read {rules_channel.mention} before starting any operation.",
-                inline=False,
-            )
-
-        if verification_channel:
-            embed.add_field(
-                name="🧩 Verification",
-                value=f"Complete verification in {verification_channel.mention} to unlock the server.",
-                inline=False,
-            )
-
-        # ----- DM to user (with button that jumps to #verification) -----
-        dm_view = None
-        if verification_channel:
-            dm_view = discord.ui.View()
-            url = f"https://discord.com/channels/{guild.id}/{verification_channel.id}"
-            dm_view.add_item(
-                discord.ui.Button(
-                    label="Go to Verification Channel",
-                    url=url,
-                    style=discord.ButtonStyle.link,
-                )
-            )
-
-        try:
-            await member.send(
-                content=f"Welcome to **{guild.name}**, {member.display_name}. 🛰",
-                embed=embed,
-                view=dm_view,
-            )
-        except discord.Forbidden:
-            pass
-
-        # ----- Message in welcome channel -----
+        # ----- Message in welcome channel (merged under join spikes) -----
         if welcome_channel:
-            await welcome_channel.send(content=member.mention, embed=embed)
+            self.dispatcher.welcome(welcome_channel, member, embed)
 
-        # Autorole
+        # Autorole (during firewall mode AutoModCog grants it after the CAPTCHA,
+        # since an allow overwrite on it would cancel the quarantine)
         autorole_id = settings.get("autorole_id")
-        if autorole_id:
+        if autorole_id and not self.firewall_active(guild.id):
             role = guild.get_role(autorole_id)
             if role:
                 try:
@@ -217,13 +156,21 @@ class WelcomeCog(commands.Cog):
     )
     @is_admin()
     @app_commands.describe(
-        template="Use {mention} and {server} placeholders.",
+        template="Placeholders: {mention} {name} {server} {member_count} {account_age}",
     )
     async def welcome_set_message(
         self,
         interaction: discord.Interaction,
         template: str,
     ):
+        try:
+            WelcomeTemplate(template)
+        except ValueError as e:
+            await interaction.response.send_message(
+                f"❌ Invalid template: {e}. Use {{{{ and }}}} for literal braces.",
+                ephemeral=True,
+            )
+            return
         await self.upsert_settings(
             interaction.guild.id, welcome_message=template  # type: ignore
         )
@@ -252,6 +199,19 @@ class WelcomeCog(commands.Cog):
             ephemeral=True,
         )
 
+    # ---------- /welcome_stats ----------
+
+    @app_commands.command(
+        name="welcome_stats",
+        description="Show welcome message and DM counters.",
+    )
+    @is_admin()
+    async def welcome_stats(self, interaction: discord.Interaction):
+        await interaction.response.send_message(
+            f"👋 Welcomes: {self.dispatcher.summary()}",
+            ephemeral=True,
+        )
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(WelcomeCog(bot))
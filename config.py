@@ -17,6 +17,10 @@ ADMIN_ROLE_IDS = [
 
 # ========= STORAGE =========
 DB_PATH = "data/ultimatebot.db"
+# SQLite tuning (WAL mode is always on; see utils/storage.py)
+DB_CACHE_SIZE_KB = 16 * 1024
+DB_MMAP_SIZE = 64 * 1024 * 1024
+DB_BUSY_TIMEOUT_MS = 5000
 BACKUP_ROOT = "data/backups"
 BACKUP_MESSAGES_PER_CHANNEL = 200
 
@@ -24,6 +28,8 @@ BACKUP_MESSAGES_PER_CHANNEL = 200
 DASHBOARD_USERNAME = "admin"
 DASHBOARD_PASSWORD = "DEV"  # change to stronger password
 DASHBOARD_SECRET_KEY = "super-secret-key-change-this"
+# read-only connections kept open by the dashboard (writes share one more)
+DASHBOARD_DB_READERS = 4
 
 # ========= AUTO-MOD / RAID PROTECTION =========
 VERIFICATION_CHANNEL_ID = 12344556778  # #verification
@@ -32,6 +38,92 @@ VERIFIED_ROLE_ID = 123435345345        # @Verified
 RAID_JOIN_WINDOW = 30
 RAID_JOIN_THRESHOLD = 5
 LOCKDOWN_HARD_THRESHOLD = 15
+LOCKDOWN_CONCURRENCY = 5  # channel edits in flight during a server lockdown
 
 FIREWALL_AUTO_RELEASE_MINUTES = -1  # set to -1 to disable auto-release
 CAPTCHA_EXPIRE_SECONDS = 300
+CAPTCHA_SWEEP_SECONDS = 5  # how often expired CAPTCHAs are cleaned up
+# what happens to a member whose CAPTCHA expired unanswered:
+# "kick", "reissue" (send a fresh CAPTCHA) or "release" (lift the quarantine)
+CAPTCHA_EXPIRE_ACTION = "kick"
+
+# Per-guild raid thresholds; any key left out uses the defaults above.
+# {guild_id: {"join_window": 30, "join_threshold": 5,
+#             "lockdown_threshold": 15, "auto_release_minutes": 10}}
+RAID_GUILD_OVERRIDES: dict[int, dict] = {}
+
+# Firewall quarantine: joiners get this role until they pass the CAPTCHA.
+# Its channel overwrites are set up once per guild. 0 = find a role named
+# QUARANTINE_ROLE_NAME, or create it the first time the firewall goes on.
+QUARANTINE_ROLE_ID = 0
+QUARANTINE_ROLE_NAME = "Quarantine"
+QUARANTINE_RETRY_SECONDS = 300  # after the role could not be found/created
+
+# Bad-word lists: <dir>/global.txt plus optional <dir>/<guild_id>.txt,
+# one word per line. Edited files are picked up without a restart.
+BADWORDS_DIR = "data/badwords"
+BADWORD_WORD_BOUNDARY = True  # False = also match inside longer words
+WORDLIST_RELOAD_SECONDS = 30
+
+# Link scanning: domain lists in the same layout as BADWORDS_DIR (one domain
+# per line; an entry also covers its subdomains). Allowlisted hosts are
+# never blocked.
+LINK_ALLOWLIST_DIR = "data/links/allow"
+LINK_BLOCKLIST_DIR = "data/links/block"
+
+# Moderation log rows are written in batches: flushed once this many are
+# queued or the oldest has waited MODLOG_MAX_LATENCY seconds.
+MODLOG_BATCH_SIZE = 200
+MODLOG_MAX_LATENCY = 1.0
+# while writes keep failing: pause between retries, and the most rows kept
+# (oldest are dropped past this)
+MODLOG_RETRY_SECONDS = 5.0
+MODLOG_MAX_QUEUED = 10_000
+
+# Welcomes: above WELCOME_BATCH_RATE joins per WELCOME_BATCH_WINDOW seconds,
+# new members are greeted in one merged message per window. Welcome DMs are
+# sent from a low-priority queue and skipped while the firewall is on.
+WELCOME_BATCH_RATE = 5
+WELCOME_BATCH_WINDOW = 10
+WELCOME_BATCH_MENTIONS = 30  # mentions per merged message, the rest are counted
+WELCOME_DM_PER_SECOND = 1.0
+WELCOME_DM_QUEUE_MAX = 500
+
+# Scheduled announcements are sent to their channels with this many sends
+# in flight. Failed sends (other than missing access) are retried.
+ANNOUNCE_CONCURRENCY = 8
+ANNOUNCE_RETRY_SECONDS = 60
+ANNOUNCE_MAX_ATTEMPTS = 3
+
+# /clear: messages scanned per channel at most, and the pause between
+# single deletes of messages too old for bulk delete (> 14 days).
+PURGE_MAX_AMOUNT = 10_000
+PURGE_SCAN_LIMIT = 50_000
+PURGE_SINGLE_DELETE_DELAY = 1.0
+
+# guild_settings rows are cached in the bot; changes written by the
+# dashboard are noticed within this many seconds.
+SETTINGS_POLL_SECONDS = 5
+
+# Log channel: more than LOG_CHANNEL_BURST routine entries within
+# LOG_DIGEST_WINDOW seconds are merged into one digest embed.
+LOG_DIGEST_WINDOW = 5
+LOG_CHANNEL_BURST = 5
+
+# Auto-mod rules ("invites", "badwords", "links", "duplicates", "regex",
+# "attachments", "spam") run cheapest
+# first. Per guild, rules can be switched off or pinned to the front.
+AUTOMOD_DISABLED_RULES: dict[int, set[str]] = {}
+AUTOMOD_RULE_ORDER: dict[int, list[str]] = {}
+
+# CPU-heavy regex sets run in a process pool to keep the event loop free
+# (attachment hashing releases the GIL, so it just uses a thread). A full
+# pool or a slow job skips the check for that message; the cheap rules
+# still apply.
+AUTOMOD_POOL_WORKERS = 2
+AUTOMOD_POOL_MAX_PENDING = 64
+AUTOMOD_POOL_TIMEOUT = 2.0
+AUTOMOD_OFFLOAD_MIN_LENGTH = 500  # shorter messages are matched inline
+AUTOMOD_REGEX_PATTERNS: list[str] = []  # e.g. r"fr[e3]{2}\s*nitro"
+ATTACHMENT_BLOCKLIST_DIR = "data/attachments/block"  # sha256 hex per line
+ATTACHMENT_MAX_BYTES = 8 * 1024 * 1024
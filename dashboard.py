@@ -1,12 +1,13 @@
 # dashboard.py
 
 import sqlite3
+from contextlib import asynccontextmanager
 from pathlib import Path
-from time import localtime, strftime
 import json
+from typing import Optional
 
 from fastapi import FastAPI, Form, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 from itsdangerous import URLSafeTimedSerializer, BadSignature
 
 from config import (
@@ -15,9 +16,11 @@ from config import (
     DASHBOARD_USERNAME,
     DASHBOARD_PASSWORD,
     DASHBOARD_SECRET_KEY,
+    DASHBOARD_DB_READERS,
 )
-
-app = FastAPI(title="UltimateBot Dashboard")
+from utils.modlog_queries import LogFilter, daily_counts_sync, fetch_page_sync
+from utils.settings import get_settings_sync, set_settings_sync
+from utils.storage import SyncPool
 
 DB_FILE = Path(DB_PATH)
 serializer = URLSafeTimedSerializer(DASHBOARD_SECRET_KEY)
@@ -27,10 +30,19 @@ SESSION_MAX_AGE = 60 * 60 * 24 * 7  # 7 days
 
 # ---------- DB helpers ----------
 
-def get_db():
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    return conn
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # sync routes run in FastAPI's threadpool and borrow connections from here
+    app.state.db = SyncPool(str(DB_FILE), DASHBOARD_DB_READERS)
+    yield
+    app.state.db.close()
+
+
+app = FastAPI(title="UltimateBot Dashboard", lifespan=lifespan)
+
+
+def get_pool(request: Request) -> SyncPool:
+    return request.app.state.db
 
 
 # ---------- Auth helpers ----------
@@ -55,75 +67,34 @@ def require_login(request: Request):
 
 # ---------- Stats helpers ----------
 
-def get_logs_text(limit: int) -> str:
-    if not DB_FILE.exists():
-        return "No database yet."
-
-    conn = get_db()
-    cur = conn.execute(
-        """
-        SELECT user_id, actor_id, action, reason, created_at
-        FROM moderation_logs
-        WHERE guild_id = ?
-        ORDER BY id DESC
-        LIMIT ?
-        """,
-        (GUILD_ID, limit),
-    )
-    rows = cur.fetchall()
-    conn.close()
+def get_logs_text(conn: sqlite3.Connection, limit: int) -> str:
+    page = fetch_page_sync(conn, GUILD_ID, LogFilter(), limit)
 
-    if not rows:
+    if not page.entries:
         return "No moderation logs yet."
-
-    lines = []
-    for r in rows:
-        ts_str = strftime("%Y-%m-%d %H:%M", localtime(r["created_at"]))
-        user_txt = r["user_id"] or "-"
-        reason_txt = r["reason"] or "-"
-        lines.append(
-            f"[{ts_str}] action={r['action']}, target={user_txt}, by={r['actor_id']}, reason={reason_txt}"
-        )
-    return "\n".join(lines)
+    return "\n".join(e.format() for e in page.entries)
 
 
-def get_stats():
+def get_stats(conn: sqlite3.Connection):
     """Return stats for graphs: labels (dates) + series per action."""
-    if not DB_FILE.exists():
-        return {"labels": [], "series": []}
-
-    conn = get_db()
-    cur = conn.execute(
-        """
-        SELECT
-          date(datetime(created_at, 'unixepoch')) AS d,
-          action,
-          COUNT(*) as c
-        FROM moderation_logs
-        WHERE guild_id = ?
-        GROUP BY d, action
-        ORDER BY d ASC
-        """,
-        (GUILD_ID,),
-    )
-    rows = cur.fetchall()
-    conn.close()
+    # pre-aggregated per day by a trigger on moderation_logs (see utils/storage.py)
+    try:
+        rows = daily_counts_sync(conn, GUILD_ID)
+    except sqlite3.OperationalError:
+        # rollup not created yet (bot not started since upgrading)
+        rows = []
 
     if not rows:
         return {"labels": [], "series": []}
 
-    dates = sorted({r["d"] for r in rows})
-    actions = sorted({r["action"] for r in rows})
+    dates = sorted({d for d, _, _ in rows})
+    actions = sorted({a for _, a, _ in rows})
 
     date_index = {d: i for i, d in enumerate(dates)}
     data_map = {action: [0] * len(dates) for action in actions}
 
-    for r in rows:
-        d = r["d"]
-        a = r["action"]
-        c = r["c"]
-        idx = date_index[d]
-        data_map[a][idx] = c
+    for d, a, c in rows:
+        data_map[a][date_index[d]] = c
 
     series = []
     for action, counts in data_map.items():
@@ -339,16 +310,16 @@ def index(request: Request):
     if not user:
         return RedirectResponse("/login", status_code=303)
 
-    conn = get_db()
-    cur = conn.execute(
-        """
-        SELECT welcome_channel_id, welcome_message, autorole_id, default_announce_id
-        FROM guild_settings WHERE guild_id = ?
-        """,
-        (GUILD_ID,),
-    )
-    row = cur.fetchone()
-    conn.close()
+    if DB_FILE.exists():
+        # one pooled connection for the whole page
+        with get_pool(request).reader() as conn:
+            row = get_settings_sync(conn, GUILD_ID)
+            logs_text = get_logs_text(conn, 20)
+            stats = get_stats(conn)
+    else:
+        row = None
+        logs_text = "No database yet."
+        stats = {"labels": [], "series": []}
 
     welcome_channel_id = row["welcome_channel_id"] if row else ""
     welcome_message = (
@@ -359,8 +330,6 @@ def index(request: Request):
     autorole_id = row["autorole_id"] if row else ""
     default_announce_id = row["default_announce_id"] if row else ""
 
-    logs_text = get_logs_text(20)
-    stats = get_stats()
     stats_json = json.dumps(stats)
 
     html = f"""
@@ -529,6 +498,36 @@ def index(request: Request):
 
 # ---------- Settings update routes (protected) ----------
 
+@app.get("/api/logs")
+def api_logs(
+    request: Request,
+    user_id: Optional[int] = None,
+    actor_id: Optional[int] = None,
+    action: Optional[str] = None,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+    limit: int = 50,
+):
+    """Filtered moderation log page; pass `before` / `after` ids to page."""
+    if not require_login(request):
+        return JSONResponse({"error": "not logged in"}, status_code=401)
+    if not DB_FILE.exists():
+        return {"entries": [], "has_newer": False, "has_older": False}
+
+    filt = LogFilter(user_id=user_id, actor_id=actor_id, action=action, since=since, until=until)
+    with get_pool(request).reader() as conn:
+        page = fetch_page_sync(conn, GUILD_ID, filt, max(1, min(limit, 200)), before, after)
+    return {
+        "entries": [e.__dict__ for e in page.entries],
+        "has_newer": page.has_newer,
+        "has_older": page.has_older,
+        "newest_id": page.newest_id,
+        "oldest_id": page.oldest_id,
+    }
+
+
 @app.post("/settings/welcome")
 def save_welcome(
     request: Request,
@@ -540,26 +539,14 @@ def save_welcome(
     if not user:
         return RedirectResponse("/login", status_code=303)
 
-    conn = get_db()
-    conn.execute(
-        """
-        INSERT INTO guild_settings (guild_id, welcome_channel_id, welcome_message, autorole_id, default_announce_id)
-        VALUES (?, ?, ?, ?, COALESCE((SELECT default_announce_id FROM guild_settings WHERE guild_id = ?), NULL))
-        ON CONFLICT(guild_id) DO UPDATE SET
-            welcome_channel_id = excluded.welcome_channel_id,
-            welcome_message    = excluded.welcome_message,
-            autorole_id        = excluded.autorole_id
-        """,
-        (
+    with get_pool(request).writer() as conn:
+        set_settings_sync(
+            conn,
             GUILD_ID,
-            int(welcome_channel_id) if welcome_channel_id else None,
-            welcome_message,
-            int(autorole_id) if autorole_id else None,
-            GUILD_ID,
-        ),
-    )
-    conn.commit()
-    conn.close()
+            welcome_channel_id=int(welcome_channel_id) if welcome_channel_id else None,
+            welcome_message=welcome_message,
+            autorole_id=int(autorole_id) if autorole_id else None,
+        )
     return RedirectResponse("/", status_code=303)
 
 
@@ -572,28 +559,10 @@ def save_announce(
     if not user:
         return RedirectResponse("/login", status_code=303)
 
-    conn = get_db()
-    conn.execute(
-        """
-        INSERT INTO guild_settings (guild_id, welcome_channel_id, welcome_message, autorole_id, default_announce_id)
-        VALUES (
-            ?,
-            (SELECT welcome_channel_id FROM guild_settings WHERE guild_id = ?),
-            (SELECT welcome_message FROM guild_settings WHERE guild_id = ?),
-            (SELECT autorole_id FROM guild_settings WHERE guild_id = ?),
-            ?
-        )
-        ON CONFLICT(guild_id) DO UPDATE SET
-            default_announce_id = excluded.default_announce_id
-        """,
-        (
-            GUILD_ID,
-            GUILD_ID,
+    with get_pool(request).writer() as conn:
+        set_settings_sync(
+            conn,
             GUILD_ID,
-            GUILD_ID,
-            int(default_announce_id) if default_announce_id else None,
-        ),
-    )
-    conn.commit()
-    conn.close()
+            default_announce_id=int(default_announce_id) if default_announce_id else None,
+        )
     return RedirectResponse("/", status_code=303)
@@ -0,0 +1,274 @@
+# utils/announcements.py
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable, Optional
+
+import aiosqlite
+import discord
+
+# announcement_targets.status values
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+
+
+@dataclass
+class FanOutReport:
+    total: int = 0
+    sent: int = 0
+    failed: int = 0
+    retry: int = 0
+    duration: float = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.sent}/{self.total} sent in {self.duration:.1f}s "
+            f"({self.failed} failed, {self.retry} to retry)"
+        )
+
+
+def next_occurrence(run_at: int, interval: int, now: int) -> int:
+    """First run_at + k*interval after `now`; missed runs are skipped, not replayed."""
+    if run_at > now:
+        return run_at
+    return run_at + ((now - run_at) // interval + 1) * interval
+
+
+# ---------- announcements ----------
+
+ANNOUNCEMENT_COLUMNS = "id, guild_id, channel_id, message, run_at, interval_seconds"
+
+
+@dataclass
+class Announcement:
+    id: int
+    guild_id: int
+    channel_id: int
+    message: str
+    run_at: int
+    interval_seconds: int = 0
+
+
+async def create_announcement(
+    db: aiosqlite.Connection,
+    guild_id: int,
+    channel_id: int,
+    message: str,
+    run_at: int,
+    interval_seconds: int = 0,
+) -> int:
+    """Insert a pending announcement; the caller commits (usually after add_targets)."""
+    cur = await db.execute(
+        """
+        INSERT INTO scheduled_announcements (guild_id, channel_id, message, run_at, interval_seconds)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (guild_id, channel_id, message, run_at, interval_seconds),
+    )
+    return cur.lastrowid
+
+
+async def pending_schedule(db: aiosqlite.Connection) -> list[tuple[int, int]]:
+    """(id, run_at) of every pending announcement."""
+    cur = await db.execute("SELECT id, run_at FROM scheduled_announcements WHERE sent = 0")
+    return [(ann_id, run_at) for ann_id, run_at in await cur.fetchall()]
+
+
+async def get_pending(db: aiosqlite.Connection, announcement_id: int) -> Optional[Announcement]:
+    cur = await db.execute(
+        f"SELECT {ANNOUNCEMENT_COLUMNS} FROM scheduled_announcements WHERE id = ? AND sent = 0",
+        (announcement_id,),
+    )
+    row = await cur.fetchone()
+    return Announcement(*row) if row is not None else None
+
+
+async def list_pending(db: aiosqlite.Connection, guild_id: int, limit: int) -> list[Announcement]:
+    """A guild's pending announcements, soonest first."""
+    cur = await db.execute(
+        f"""
+        SELECT {ANNOUNCEMENT_COLUMNS} FROM scheduled_announcements
+        WHERE sent = 0 AND guild_id = ?
+        ORDER BY run_at
+        LIMIT ?
+        """,
+        (guild_id, limit),
+    )
+    return [Announcement(*row) for row in await cur.fetchall()]
+
+
+async def cancel_announcement(db: aiosqlite.Connection, announcement_id: int, guild_id: int) -> bool:
+    """Retire a pending announcement of `guild_id`. False if there was none."""
+    cur = await db.execute(
+        "UPDATE scheduled_announcements SET sent = 1 WHERE id = ? AND guild_id = ? AND sent = 0",
+        (announcement_id, guild_id),
+    )
+    await db.commit()
+    return cur.rowcount > 0
+
+
+async def reschedule(db: aiosqlite.Connection, announcement_id: int, run_at: int):
+    await db.execute(
+        "UPDATE scheduled_announcements SET run_at = ? WHERE id = ?",
+        (run_at, announcement_id),
+    )
+    await db.commit()
+
+
+async def mark_sent(db: aiosqlite.Connection, announcement_id: int):
+    await db.execute(
+        "UPDATE scheduled_announcements SET sent = 1 WHERE id = ?",
+        (announcement_id,),
+    )
+    await db.commit()
+
+
+# ---------- targets ----------
+
+async def add_targets(
+    db: aiosqlite.Connection,
+    announcement_id: int,
+    targets: Iterable[tuple[int, int]],
+):
+    """Register (guild_id, channel_id) targets; duplicates are ignored."""
+    now = int(time.time())
+    await db.executemany(
+        """
+        INSERT OR IGNORE INTO announcement_targets
+            (announcement_id, guild_id, channel_id, status, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        [(announcement_id, g, c, PENDING, now) for g, c in targets],
+    )
+
+
+async def start_occurrence(
+    db: aiosqlite.Connection,
+    announcement_id: int,
+    run_at: int,
+    fallback: tuple[int, int],
+) -> list[tuple[int, int]]:
+    """
+    Targets still owed the occurrence due at `run_at`.
+
+    Targets left over from an earlier occurrence are reset to pending;
+    ones already handled for this occurrence (sent before a crash or
+    restart) are left alone, so resuming never sends twice. Rows created
+    before targets existed use their own channel (`fallback`).
+    """
+    cur = await db.execute(
+        "SELECT 1 FROM announcement_targets WHERE announcement_id = ? LIMIT 1",
+        (announcement_id,),
+    )
+    if await cur.fetchone() is None:
+        await add_targets(db, announcement_id, [fallback])
+
+    await db.execute(
+        """
+        UPDATE announcement_targets
+        SET run_at = ?, status = ?, attempts = 0, error = NULL
+        WHERE announcement_id = ? AND run_at < ?
+        """,
+        (run_at, PENDING, announcement_id, run_at),
+    )
+    await db.commit()
+
+    cur = await db.execute(
+        """
+        SELECT guild_id, channel_id FROM announcement_targets
+        WHERE announcement_id = ? AND status = ?
+        """,
+        (announcement_id, PENDING),
+    )
+    return [(g, c) for g, c in await cur.fetchall()]
+
+
+async def mark_target(
+    db: aiosqlite.Connection,
+    announcement_id: int,
+    channel_id: int,
+    status: str,
+    error: Optional[str] = None,
+):
+    await db.execute(
+        """
+        UPDATE announcement_targets
+        SET status = ?, error = ?, attempts = attempts + 1, updated_at = ?
+        WHERE announcement_id = ? AND channel_id = ?
+        """,
+        (status, error, int(time.time()), announcement_id, channel_id),
+    )
+    # committed per target so a crash mid fan-out loses no progress
+    await db.commit()
+
+
+async def fail_exhausted(db: aiosqlite.Connection, announcement_id: int, max_attempts: int) -> int:
+    """Give up on pending targets that used all their attempts."""
+    cur = await db.execute(
+        """
+        UPDATE announcement_targets SET status = ?
+        WHERE announcement_id = ? AND status = ? AND attempts >= ?
+        """,
+        (FAILED, announcement_id, PENDING, max_attempts),
+    )
+    await db.commit()
+    return cur.rowcount
+
+
+async def target_counts(db: aiosqlite.Connection, announcement_id: int) -> dict[str, int]:
+    cur = await db.execute(
+        """
+        SELECT status, COUNT(*) FROM announcement_targets
+        WHERE announcement_id = ? GROUP BY status
+        """,
+        (announcement_id,),
+    )
+    return {status: n for status, n in await cur.fetchall()}
+
+
+# ---------- fan-out ----------
+
+async def fan_out(
+    db: aiosqlite.Connection,
+    announcement_id: int,
+    targets: list[tuple[int, int]],
+    resolve: Callable[[int, int], Optional[discord.abc.Messageable]],
+    send: Callable[[discord.abc.Messageable], Awaitable[object]],
+    concurrency: int,
+) -> FanOutReport:
+    """
+    Send to every target with at most `concurrency` sends in flight,
+    recording each outcome as it lands.
+
+    Missing channels and permission errors are final (failed); other HTTP
+    errors leave the target pending for a retry.
+    """
+    report = FanOutReport(total=len(targets))
+    sem = asyncio.Semaphore(max(1, concurrency))
+    started = time.monotonic()
+
+    async def worker(guild_id: int, channel_id: int):
+        channel = resolve(guild_id, channel_id)
+        if channel is None:
+            report.failed += 1
+            await mark_target(db, announcement_id, channel_id, FAILED, "channel not found")
+            return
+        async with sem:
+            try:
+                await send(channel)
+            except (discord.Forbidden, discord.NotFound) as e:
+                report.failed += 1
+                await mark_target(db, announcement_id, channel_id, FAILED, str(e)[:200])
+                return
+            except discord.HTTPException as e:
+                report.retry += 1
+                await mark_target(db, announcement_id, channel_id, PENDING, str(e)[:200])
+                return
+        report.sent += 1
+        await mark_target(db, announcement_id, channel_id, SENT)
+
+    await asyncio.gather(*(worker(g, c) for g, c in targets))
+    report.duration = time.monotonic() - started
+    return report
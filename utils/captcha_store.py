@@ -0,0 +1,130 @@
+# utils/captcha_store.py
+
+import heapq
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import aiosqlite
+
+Key = Tuple[int, int]  # (guild_id, user_id)
+
+
+@dataclass
+class PendingCaptcha:
+    guild_id: int
+    user_id: int
+    code: str
+    options: list[str]
+    channel_id: Optional[int]
+    message_id: Optional[int]
+    created_at: int
+    expires_at: int
+
+    @property
+    def key(self) -> Key:
+        return (self.guild_id, self.user_id)
+
+
+class CaptchaStore:
+    """
+    Pending CAPTCHAs: persisted in `pending_captchas`, cached in a dict and
+    ordered by expiry in a min-heap. Heap entries are removed lazily – a
+    popped entry only counts if it still matches the cached one.
+    """
+
+    def __init__(self, db: aiosqlite.Connection):
+        self.db = db
+        self._pending: Dict[Key, PendingCaptcha] = {}
+        self._heap: list[Tuple[int, int, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def __iter__(self):
+        return iter(list(self._pending.values()))
+
+    def get(self, guild_id: int, user_id: int) -> Optional[PendingCaptcha]:
+        return self._pending.get((guild_id, user_id))
+
+    def _track(self, entry: PendingCaptcha):
+        self._pending[entry.key] = entry
+        heapq.heappush(self._heap, (entry.expires_at, entry.guild_id, entry.user_id))
+
+    async def load(self) -> list[PendingCaptcha]:
+        cur = await self.db.execute(
+            """
+            SELECT guild_id, user_id, code, options, channel_id, message_id,
+                   created_at, expires_at
+            FROM pending_captchas
+            ORDER BY expires_at
+            """
+        )
+        for row in await cur.fetchall():
+            entry = PendingCaptcha(
+                guild_id=row[0],
+                user_id=row[1],
+                code=row[2],
+                options=row[3].split(","),
+                channel_id=row[4],
+                message_id=row[5],
+                created_at=row[6],
+                expires_at=row[7],
+            )
+            self._track(entry)
+        return list(self._pending.values())
+
+    async def add(self, entry: PendingCaptcha):
+        self._track(entry)
+        await self.db.execute(
+            """
+            INSERT OR REPLACE INTO pending_captchas
+                (guild_id, user_id, code, options, channel_id, message_id,
+                 created_at, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                entry.guild_id,
+                entry.user_id,
+                entry.code,
+                ",".join(entry.options),
+                entry.channel_id,
+                entry.message_id,
+                entry.created_at,
+                entry.expires_at,
+            ),
+        )
+        await self.db.commit()
+
+    async def remove(self, guild_id: int, user_id: int) -> Optional[PendingCaptcha]:
+        entry = self._pending.pop((guild_id, user_id), None)
+        if entry is not None:
+            await self.db.execute(
+                "DELETE FROM pending_captchas WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id),
+            )
+            await self.db.commit()
+            # rebuild once stale heap entries (solved, left) outnumber live ones
+            if len(self._heap) > 2 * len(self._pending) + 64:
+                self._heap = [
+                    (e.expires_at, e.guild_id, e.user_id) for e in self._pending.values()
+                ]
+                heapq.heapify(self._heap)
+        return entry
+
+    async def pop_expired(self, now: int) -> list[PendingCaptcha]:
+        """Remove and return every entry whose expiry has passed."""
+        expired = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            expires_at, guild_id, user_id = heapq.heappop(heap)
+            entry = self._pending.get((guild_id, user_id))
+            if entry is None or entry.expires_at != expires_at:
+                continue  # already solved or re-issued
+            del self._pending[entry.key]
+            expired.append(entry)
+        if expired:
+            await self.db.execute(
+                "DELETE FROM pending_captchas WHERE expires_at <= ?", (now,)
+            )
+            await self.db.commit()
+        return expired
@@ -0,0 +1,155 @@
+# utils/domains.py
+
+import os
+import re
+from typing import Iterable, Iterator, Optional
+from urllib.parse import urlsplit
+
+from utils.listfiles import GuildListCache, ListFile
+
+# labels may hold any letters, so lookalike hosts (Cyrillic "і" in
+# "evіl.com") are found and then compared in their IDNA (xn--) form
+_HOST = r"(?:[^\W_](?:[\w-]{0,61}[^\W_])?\.)+[^\W\d_][\w-]{0,62}"
+
+# A bare host (no scheme) only counts with a www. prefix or one of these
+# TLDs, so "e.g" or "file.txt" in chat is not taken for a link. IDN TLDs
+# (xn--...) always count.
+BARE_HOST_TLDS = frozenset(
+    """
+    com net org edu gov info biz io gg co me tv cc ly to ws pw su ru ua by kz
+    us uk ca au nz de fr nl be ch at it es pt pl se no dk fi cz sk hu ro bg gr
+    tr il ir in cn jp kr tw hk sg my id ph vn th br ar mx cl za ng eu asia
+    app dev xyz top site online live link click shop store tech space fun
+    club pro one win bid vip icu cyou buzz lol tk ml ga cf gq
+    """.split()
+)
+
+# links: either scheme://authority (group 1), or a bare host (group 2).
+# The `@` lookbehind only applies to bare hosts, where it skips e-mail
+# addresses; with a scheme, whatever precedes the last `@` is userinfo,
+# so https://discord.com@evil.com goes to evil.com. Browsers end the
+# authority at a backslash too.
+HOST_RE = re.compile(
+    r"[a-z][a-z0-9+.-]*://([^\s/\\?#<>]*)"
+    rf"|(?<![\w@.-])({_HOST})(?![\w-])",
+    re.IGNORECASE,
+)
+_HOST_PREFIX_RE = re.compile(_HOST, re.IGNORECASE)
+
+_END = ""  # terminal marker; labels are never empty
+
+
+def _authority_host(authority: str) -> Optional[str]:
+    try:
+        hostname = urlsplit("//" + authority).hostname
+    except ValueError:  # malformed [ipv6] part
+        return None
+    if not hostname:
+        return None
+    # trailing markdown or punctuation, e.g. **https://evil.com**
+    m = _HOST_PREFIX_RE.match(hostname)
+    return m.group(0).lower() if m else None
+
+
+def to_ascii(host: str) -> Optional[str]:
+    """IDNA (punycode) form of `host`; None if it can't be encoded."""
+    if host.isascii():
+        return host
+    try:
+        return host.encode("idna").decode("ascii").lower()
+    except UnicodeError:
+        return None
+
+
+def _bare_host_ok(host: str) -> bool:
+    tld = host.rsplit(".", 1)[-1]
+    return host.startswith("www.") or tld in BARE_HOST_TLDS or tld.startswith("xn--")
+
+
+def extract_hosts(text: str) -> Iterator[str]:
+    for m in HOST_RE.finditer(text):
+        if m.group(2) is not None:
+            host = to_ascii(m.group(2).lower())
+            if host and _bare_host_ok(host):
+                yield host
+        else:
+            host = _authority_host(m.group(1))
+            if host:
+                host = to_ascii(host)
+                if host:
+                    yield host
+
+
+def _clean(domain: str) -> str:
+    domain = domain.strip().lower()
+    if domain.startswith("*."):
+        domain = domain[2:]
+    return to_ascii(domain.strip(".")) or ""
+
+
+class DomainTrie:
+    """
+    Suffix trie over reversed domain labels (com -> example -> www).
+
+    An entry matches the domain itself and every subdomain of it, and a
+    lookup costs one dict step per label of the host, regardless of how
+    many domains are loaded.
+    """
+
+    def __init__(self, domains: Iterable[str] = ()):
+        self._root: dict = {}
+        self.size = 0
+        for domain in domains:
+            self.add(domain)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, domain: str):
+        domain = _clean(domain)
+        if not domain:
+            return
+        node = self._root
+        for label in reversed(domain.split(".")):
+            node = node.setdefault(label, {})
+        if _END not in node:
+            node[_END] = True
+            self.size += 1
+
+    def match(self, host: str) -> Optional[str]:
+        """Return the listed suffix that covers `host`, or None."""
+        node = self._root
+        labels = host.lower().rstrip(".").split(".")
+        depth = 0
+        for label in reversed(labels):
+            node = node.get(label)
+            if node is None:
+                return None
+            depth += 1
+            if _END in node:
+                return ".".join(labels[-depth:])
+        return None
+
+
+class DomainLists:
+    """
+    Domain lists from a directory laid out like GuildListCache's. The
+    shared global.txt is compiled once and checked alongside each guild's
+    own (small) trie, so a large global list costs one build, not one per
+    guild.
+    """
+
+    def __init__(self, root: str):
+        self.shared: ListFile[DomainTrie] = ListFile(os.path.join(root, "global.txt"), DomainTrie)
+        self.guilds: GuildListCache[DomainTrie] = GuildListCache(root, DomainTrie, include_global=False)
+
+    def is_empty(self, guild_id: int) -> bool:
+        return not self.shared.get() and not self.guilds.get(guild_id)
+
+    def match(self, guild_id: int, host: str) -> Optional[str]:
+        return self.shared.get().match(host) or self.guilds.get(guild_id).match(host)
+
+    def reload_changed(self) -> list[str]:
+        """Names of the lists rebuilt ("global" or guild ids)."""
+        reloaded = ["global"] if self.shared.reload_changed() else []
+        return reloaded + [str(g) for g in self.guilds.reload_changed()]
@@ -0,0 +1,180 @@
+# utils/fingerprint.py
+
+import hashlib
+import re
+from collections import deque
+from typing import Dict, Optional
+
+from utils.wordfilter import normalize
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9\s]+")
+
+BANDS = 4
+BAND_BITS = 16
+BAND_MASK = (1 << BAND_BITS) - 1
+MASK64 = (1 << 64) - 1
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, undo leetspeak, drop punctuation, collapse whitespace."""
+    return " ".join(_NON_WORD_RE.sub(" ", normalize(text)).split())
+
+
+def simhash(text: str) -> int:
+    """64-bit simhash over word bigrams (single words for short texts)."""
+    words = text.split()
+    if len(words) > 1:
+        features = [f"{a} {b}" for a, b in zip(words, words[1:])]
+    else:
+        features = words
+
+    # Bit i of the result is set when more than half the feature hashes have
+    # it set. Counts for all 64 bit positions are kept "bit-sliced":
+    # counter[j] holds bit j of every position's count, so adding a hash is
+    # a few big-int ops instead of a 64-step loop.
+    counter: list[int] = []
+    for feature in features:
+        carry = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+        for j in range(len(counter)):
+            c = counter[j]
+            counter[j] = c ^ carry
+            carry &= c
+            if not carry:
+                break
+        if carry:
+            counter.append(carry)
+
+    # positions whose count >= len(features) // 2 + 1, compared MSB first
+    threshold = len(features) // 2 + 1
+    greater, equal = 0, MASK64
+    for j in reversed(range(max(len(counter), threshold.bit_length()))):
+        c = counter[j] if j < len(counter) else 0
+        if threshold >> j & 1:
+            equal &= c
+        else:
+            greater |= equal & c
+            equal &= ~c & MASK64
+    return greater | equal
+
+
+class FingerprintEntry:
+    __slots__ = ("ts", "user_id", "fp", "channel_id", "message_id", "flagged")
+
+    def __init__(self, ts: float, user_id: int, fp: int, channel_id: int, message_id: int):
+        self.ts = ts
+        self.user_id = user_id
+        self.fp = fp
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.flagged = False
+
+
+class _GuildIndex:
+    __slots__ = ("entries", "buckets")
+
+    def __init__(self):
+        self.entries: deque[FingerprintEntry] = deque()
+        # small lists (capped at max_bucket) are far lighter than deques here
+        self.buckets: Dict[int, list[FingerprintEntry]] = {}
+
+
+class DuplicateDetector:
+    """
+    Rolling near-duplicate index of recent guild messages.
+
+    Each message gets a simhash split into 4 bands of 16 bits (LSH). Two
+    fingerprints within 3 bits share at least one band, so only the few
+    messages in the same band buckets are compared. Buckets, the window
+    and the per-guild entry count are all capped, keeping both work per
+    message and memory bounded.
+    """
+
+    def __init__(
+        self,
+        window: float = 60.0,
+        min_users: int = 4,
+        max_distance: int = 3,
+        min_length: int = 12,
+        max_entries: int = 5000,
+        max_bucket: int = 64,
+    ):
+        self.window = window
+        self.min_users = min_users
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self.max_entries = max_entries
+        self.max_bucket = max_bucket
+        self._guilds: Dict[int, _GuildIndex] = {}
+
+    def _expire(self, index: _GuildIndex, now: float):
+        cutoff = now - self.window
+        entries = index.entries
+        while entries and (entries[0].ts < cutoff or len(entries) > self.max_entries):
+            old = entries.popleft()
+            for key in self._band_keys(old.fp):
+                bucket = index.buckets.get(key)
+                if bucket and bucket[0] is old:
+                    del bucket[0]
+                    if not bucket:
+                        del index.buckets[key]
+
+    @staticmethod
+    def _band_keys(fp: int) -> list[int]:
+        # (band number, band value) packed into one int
+        return [b << BAND_BITS | (fp >> (b * BAND_BITS) & BAND_MASK) for b in range(BANDS)]
+
+    def check(
+        self,
+        guild_id: int,
+        user_id: int,
+        text: str,
+        channel_id: int,
+        message_id: int,
+        now: float,
+    ) -> Optional[list[FingerprintEntry]]:
+        """
+        Record a message. If it completes a cluster of near-identical
+        messages from at least `min_users` users, return the earlier
+        matching entries that have not been flagged yet (possibly empty).
+        """
+        normalized = normalize_text(text)
+        if len(normalized) < self.min_length:
+            return None
+
+        index = self._guilds.get(guild_id)
+        if index is None:
+            index = self._guilds[guild_id] = _GuildIndex()
+        self._expire(index, now)
+
+        fp = simhash(normalized)
+        entry = FingerprintEntry(now, user_id, fp, channel_id, message_id)
+        matches: Dict[int, FingerprintEntry] = {}
+        keys = self._band_keys(fp)
+        for key in keys:
+            bucket = index.buckets.get(key)
+            if not bucket:
+                continue
+            for other in bucket:
+                if id(other) not in matches and bin(fp ^ other.fp).count("1") <= self.max_distance:
+                    matches[id(other)] = other
+
+        index.entries.append(entry)
+        for key in keys:
+            bucket = index.buckets.get(key)
+            if bucket is None:
+                index.buckets[key] = [entry]
+                continue
+            bucket.append(entry)
+            if len(bucket) > self.max_bucket:
+                del bucket[0]
+
+        users = {m.user_id for m in matches.values()}
+        users.add(user_id)
+        if len(users) < self.min_users:
+            return None
+
+        entry.flagged = True
+        fresh = [m for m in matches.values() if not m.flagged]
+        for m in fresh:
+            m.flagged = True
+        return fresh
@@ -0,0 +1,134 @@
+# utils/listfiles.py
+
+import os
+from typing import Callable, Dict, Generic, Iterable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def read_list_file(path: str) -> list[str]:
+    """One entry per line; blank lines and `#` comments are ignored."""
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                entries.append(line)
+    return entries
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return 0.0
+
+
+class ListFile(Generic[T]):
+    """A single list file, compiled once and rebuilt when it changes on disk."""
+
+    def __init__(self, path: str, build: Callable[[Iterable[str]], T], defaults: Iterable[str] = ()):
+        self.path = path
+        self.build = build
+        self.defaults = tuple(defaults)
+        self._compiled: Optional[T] = None
+        self._loaded_mtime = 0.0
+
+    def _load(self) -> T:
+        entries = list(self.defaults)
+        self._loaded_mtime = _mtime(self.path)
+        if os.path.exists(self.path):
+            entries.extend(read_list_file(self.path))
+        self._compiled = self.build(entries)
+        return self._compiled
+
+    def get(self) -> T:
+        compiled = self._compiled
+        if compiled is None:
+            compiled = self._load()
+        return compiled
+
+    def reload_changed(self) -> bool:
+        if self._compiled is None or _mtime(self.path) == self._loaded_mtime:
+            return False
+        self._load()
+        return True
+
+
+class GuildListCache(Generic[T]):
+    """
+    Per-guild compiled lists loaded from a directory:
+
+        <root>/global.txt      shared by every guild
+        <root>/<guild_id>.txt  extra entries for one guild
+
+    `build` turns the merged entries into whatever structure the caller
+    matches against. Compiled objects are swapped in with a single dict
+    assignment, so readers never see a half-built one.
+
+    With `include_global=False` only the guild's own file is compiled;
+    callers that can check two structures keep global.txt in one ListFile
+    instead of copying it into every guild.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        build: Callable[[Iterable[str]], T],
+        defaults: Iterable[str] = (),
+        include_global: bool = True,
+    ):
+        self.root = root
+        self.build = build
+        self.defaults = tuple(defaults)
+        self.include_global = include_global
+        self._compiled: Dict[int, T] = {}
+        self._mtimes: Dict[int, Tuple[float, ...]] = {}
+        self._overrides: Dict[int, Tuple[str, ...]] = {}
+
+    def _paths(self, guild_id: int) -> Tuple[str, ...]:
+        guild_path = os.path.join(self.root, f"{guild_id}.txt")
+        if not self.include_global:
+            return (guild_path,)
+        return (os.path.join(self.root, "global.txt"), guild_path)
+
+    def _stamp(self, guild_id: int) -> Tuple[float, ...]:
+        return tuple(_mtime(path) for path in self._paths(guild_id))
+
+    def _load(self, guild_id: int) -> T:
+        if guild_id in self._overrides:
+            entries = list(self._overrides[guild_id])
+        else:
+            entries = list(self.defaults)
+            for path in self._paths(guild_id):
+                if os.path.exists(path):
+                    entries.extend(read_list_file(path))
+        self._mtimes[guild_id] = self._stamp(guild_id)
+        compiled = self.build(entries)
+        self._compiled[guild_id] = compiled
+        return compiled
+
+    def get(self, guild_id: int) -> T:
+        compiled = self._compiled.get(guild_id)
+        if compiled is None:
+            compiled = self._load(guild_id)
+        return compiled
+
+    def override(self, guild_id: int, entries: Optional[Iterable[str]]):
+        """Pin a guild to an in-memory list (None goes back to the files)."""
+        if entries is None:
+            self._overrides.pop(guild_id, None)
+        else:
+            self._overrides[guild_id] = tuple(entries)
+        self._load(guild_id)
+
+    def reload_changed(self) -> list[int]:
+        """Rebuild every loaded guild whose files changed on disk."""
+        reloaded = []
+        for guild_id in list(self._compiled):
+            if guild_id in self._overrides:
+                continue
+            if self._stamp(guild_id) != self._mtimes.get(guild_id):
+                self._load(guild_id)
+                reloaded.append(guild_id)
+        return reloaded
@@ -0,0 +1,167 @@
+# utils/lockdown.py
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable, Optional
+
+import aiosqlite
+import discord
+
+# progress(done, total) – called as channels finish
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+
+@dataclass
+class LockdownReport:
+    total: int = 0
+    changed: int = 0
+    skipped: int = 0
+    failed: int = 0
+    duration: float = 0.0
+
+    def summary(self, verb: str) -> str:
+        return (
+            f"{verb} {self.changed}/{self.total} channels in {self.duration:.1f}s "
+            f"({self.skipped} unchanged, {self.failed} failed)"
+        )
+
+
+async def run_channel_jobs(
+    channels: Iterable[discord.abc.GuildChannel],
+    job: Callable[[discord.abc.GuildChannel], Awaitable[bool]],
+    concurrency: int,
+    progress: Optional[ProgressCallback] = None,
+) -> LockdownReport:
+    """
+    Run `job` over channels with at most `concurrency` requests in flight.
+
+    discord.py already queues per rate-limit bucket and retries 429s; the
+    semaphore keeps us from flooding the global limit. `job` returns True
+    if it changed something, False if nothing needed doing.
+    """
+    channels = list(channels)
+    report = LockdownReport(total=len(channels))
+    sem = asyncio.Semaphore(max(1, concurrency))
+    started = time.monotonic()
+    done = 0
+
+    async def worker(ch: discord.abc.GuildChannel):
+        nonlocal done
+        async with sem:
+            try:
+                if await job(ch):
+                    report.changed += 1
+                else:
+                    report.skipped += 1
+            except discord.HTTPException:
+                report.failed += 1
+        done += 1
+        if progress is not None:
+            await progress(done, report.total)
+
+    await asyncio.gather(*(worker(ch) for ch in channels))
+    report.duration = time.monotonic() - started
+    return report
+
+
+# ---------- snapshot / restore ----------
+
+async def save_snapshot(db: aiosqlite.Connection, guild: discord.Guild):
+    """
+    Record each text channel's @everyone overwrite before locking.
+
+    Existing rows win (INSERT OR IGNORE), so locking twice never replaces
+    the original state with an already-locked one.
+    """
+    now = int(time.time())
+    rows = []
+    for ch in guild.text_channels:
+        existed = guild.default_role in ch.overwrites
+        allow, deny = ch.overwrites_for(guild.default_role).pair()
+        rows.append((guild.id, ch.id, allow.value, deny.value, int(existed), now))
+    await db.executemany(
+        """
+        INSERT OR IGNORE INTO lockdown_snapshots
+            (guild_id, channel_id, allow, deny, existed, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+    await db.commit()
+
+
+async def has_snapshot(db: aiosqlite.Connection, guild_id: int) -> bool:
+    cur = await db.execute(
+        "SELECT 1 FROM lockdown_snapshots WHERE guild_id = ? LIMIT 1", (guild_id,)
+    )
+    return await cur.fetchone() is not None
+
+
+async def lock_guild(
+    db: aiosqlite.Connection,
+    guild: discord.Guild,
+    concurrency: int,
+    reason: str,
+    progress: Optional[ProgressCallback] = None,
+) -> LockdownReport:
+    await save_snapshot(db, guild)
+
+    async def lock(ch: discord.TextChannel) -> bool:
+        overwrite = ch.overwrites_for(guild.default_role)
+        if overwrite.send_messages is False:
+            return False
+        overwrite.send_messages = False
+        await ch.set_permissions(guild.default_role, overwrite=overwrite, reason=reason)
+        return True
+
+    return await run_channel_jobs(guild.text_channels, lock, concurrency, progress)
+
+
+async def restore_guild(
+    db: aiosqlite.Connection,
+    guild: discord.Guild,
+    concurrency: int,
+    reason: str,
+    progress: Optional[ProgressCallback] = None,
+) -> LockdownReport:
+    """Put every snapshotted channel back; restored rows are deleted."""
+    cur = await db.execute(
+        """
+        SELECT channel_id, allow, deny, existed
+        FROM lockdown_snapshots WHERE guild_id = ?
+        """,
+        (guild.id,),
+    )
+    saved = {row[0]: row[1:] for row in await cur.fetchall()}
+    restored: list[int] = []
+
+    async def restore(ch: discord.TextChannel) -> bool:
+        allow, deny, existed = saved[ch.id]
+        if existed:
+            overwrite: Optional[discord.PermissionOverwrite] = (
+                discord.PermissionOverwrite.from_pair(
+                    discord.Permissions(allow), discord.Permissions(deny)
+                )
+            )
+        else:
+            overwrite = None
+        current = ch.overwrites.get(guild.default_role)
+        if current == overwrite:
+            restored.append(ch.id)
+            return False
+        await ch.set_permissions(guild.default_role, overwrite=overwrite, reason=reason)
+        restored.append(ch.id)
+        return True
+
+    channels = [ch for ch in guild.text_channels if ch.id in saved]
+    report = await run_channel_jobs(channels, restore, concurrency, progress)
+
+    # deleted channels are dropped too; failed ones stay for a retry
+    gone = [cid for cid in saved if guild.get_channel(cid) is None]
+    await db.executemany(
+        "DELETE FROM lockdown_snapshots WHERE guild_id = ? AND channel_id = ?",
+        [(guild.id, cid) for cid in restored + gone],
+    )
+    await db.commit()
+    return report
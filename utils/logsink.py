@@ -0,0 +1,131 @@
+# utils/logsink.py
+
+import asyncio
+import time
+from collections import Counter, deque
+from typing import Dict, Optional
+
+import discord
+
+DIGEST_SAMPLE_LINES = 10
+
+
+class _GuildBuffer:
+    __slots__ = ("recent", "pending", "flush_task")
+
+    def __init__(self, burst: int):
+        self.recent: deque[float] = deque(maxlen=burst)
+        self.pending: list[tuple[str, str]] = []
+        self.flush_task: Optional[asyncio.Task] = None
+
+
+class LogChannelSink:
+    """
+    Rate-aware sender for the log channel.
+
+    Routine entries go out one by one while a guild stays under `burst`
+    sends per `window` seconds. Past that they are buffered and merged into
+    a single digest embed per window. Priority entries (firewall, lockdown)
+    skip the buffer entirely. Sends run as background tasks so callers
+    never wait on Discord rate limits.
+    """
+
+    def __init__(self, channel_id: int, window: float = 5.0, burst: int = 5):
+        self.channel_id = channel_id
+        self.window = window
+        self.burst = burst
+        self._guilds: Dict[int, _GuildBuffer] = {}
+        self._tasks: set[asyncio.Task] = set()
+        # counters
+        self.sent = 0
+        self.digests = 0
+        self.merged = 0
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _channel(self, guild: discord.Guild) -> Optional[discord.TextChannel]:
+        chan = guild.get_channel(self.channel_id)
+        return chan if isinstance(chan, discord.TextChannel) else None
+
+    async def _send(self, guild: discord.Guild, **kwargs):
+        chan = self._channel(guild)
+        if chan is None:
+            return
+        try:
+            await chan.send(**kwargs)
+            self.sent += 1
+        except discord.HTTPException as e:
+            print(f"[LOGSINK] Send failed in guild {guild.id}: {e}")
+
+    def post(
+        self,
+        guild: discord.Guild,
+        text: str,
+        kind: str = "event",
+        priority: bool = False,
+    ):
+        if priority:
+            self._spawn(self._send(guild, content=text))
+            return
+
+        buf = self._guilds.get(guild.id)
+        if buf is None:
+            buf = self._guilds[guild.id] = _GuildBuffer(self.burst)
+
+        now = time.monotonic()
+        under_limit = len(buf.recent) < self.burst or now - buf.recent[0] > self.window
+        if not buf.pending and under_limit:
+            buf.recent.append(now)
+            self._spawn(self._send(guild, content=text))
+            return
+
+        buf.pending.append((kind, text))
+        if buf.flush_task is None:
+            buf.flush_task = self._spawn(self._flush_later(guild, buf))
+
+    async def _flush_later(self, guild: discord.Guild, buf: _GuildBuffer):
+        await asyncio.sleep(self.window)
+        buf.flush_task = None
+        await self._flush(guild, buf)
+
+    async def _flush(self, guild: discord.Guild, buf: _GuildBuffer):
+        entries, buf.pending = buf.pending, []
+        if not entries:
+            return
+        buf.recent.append(time.monotonic())
+        if len(entries) == 1:
+            await self._send(guild, content=entries[0][1])
+            return
+
+        counts = Counter(kind for kind, _ in entries)
+        summary = ", ".join(f"{c} {kind}" for kind, c in counts.most_common())
+        embed = discord.Embed(
+            title="📋 Log digest",
+            description=f"{summary} in the last {self.window:g}s",
+            color=discord.Color.dark_grey(),
+        )
+        sample = [text for _, text in entries[-DIGEST_SAMPLE_LINES:]]
+        if len(entries) > DIGEST_SAMPLE_LINES:
+            sample.insert(0, f"… {len(entries) - DIGEST_SAMPLE_LINES} earlier entries")
+        embed.add_field(name="Latest", value="\n".join(sample)[:1024], inline=False)
+        embed.timestamp = discord.utils.utcnow()
+        self.digests += 1
+        self.merged += len(entries)
+        await self._send(guild, embed=embed)
+
+    async def close(self, guilds: list[discord.Guild]):
+        """Send anything still buffered (used on cog unload)."""
+        for guild in guilds:
+            buf = self._guilds.get(guild.id)
+            if buf is None:
+                continue
+            if buf.flush_task is not None:
+                buf.flush_task.cancel()
+                buf.flush_task = None
+            await self._flush(guild, buf)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,132 @@
+# utils/modlog.py
+
+import asyncio
+import time
+from typing import Optional
+
+import aiosqlite
+
+INSERT_SQL = """
+INSERT INTO moderation_logs (guild_id, user_id, actor_id, action, reason, created_at)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+class ModLogWriter:
+    """
+    Write-behind queue for moderation_logs.
+
+    `add()` only appends to memory; a background task writes the pending rows
+    with one executemany + commit once `batch_size` rows are queued or the
+    oldest row has waited `max_latency` seconds, whichever comes first.
+
+    A failed batch is rolled back and retried after `retry_delay`, so `db`
+    should be a connection nobody else writes on. While writes keep
+    failing, at most `max_queued` rows are kept; the oldest are dropped.
+    """
+
+    def __init__(
+        self,
+        db: aiosqlite.Connection,
+        batch_size: int = 200,
+        max_latency: float = 1.0,
+        max_queued: int = 10_000,
+        retry_delay: float = 5.0,
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.max_queued = max_queued
+        self.retry_delay = retry_delay
+        self._rows: list[tuple] = []
+        self._has_rows = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        # counters
+        self.rows_written = 0
+        self.batches_written = 0
+        self.rows_dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def add(
+        self,
+        guild_id: int,
+        user_id: Optional[int],
+        actor_id: Optional[int],
+        action: str,
+        reason: str = "",
+        created_at: Optional[int] = None,
+    ):
+        ts = created_at if created_at is not None else int(time.time())
+        self._rows.append((guild_id, user_id, actor_id, action, reason, ts))
+        self._trim()
+        self._has_rows.set()
+        if len(self._rows) >= self.batch_size:
+            self._batch_full.set()
+
+    def _trim(self):
+        excess = len(self._rows) - self.max_queued
+        if excess > 0:
+            del self._rows[:excess]
+            self.rows_dropped += excess
+
+    async def _run(self):
+        while True:
+            await self._has_rows.wait()
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), self.max_latency)
+            except asyncio.TimeoutError:
+                pass
+            if not await self.flush():
+                await asyncio.sleep(self.retry_delay)
+
+    async def flush(self) -> bool:
+        """Write everything queued. False if the write failed (rows kept)."""
+        async with self._lock:
+            rows, self._rows = self._rows, []
+            self._has_rows.clear()
+            self._batch_full.clear()
+            if not rows:
+                return True
+            try:
+                await self.db.executemany(INSERT_SQL, rows)
+                await self.db.commit()
+            except Exception as e:
+                # keep the rows for the next attempt instead of losing them;
+                # roll back first, or rows inserted before a failed commit
+                # would stay in the open transaction and be written twice
+                print(
+                    f"[MODLOG] Failed to write {len(rows)} log rows: {e} "
+                    f"({self.rows_dropped} dropped so far, queue capped at {self.max_queued})"
+                )
+                try:
+                    await self.db.rollback()
+                except Exception as rb:
+                    print(f"[MODLOG] Rollback failed: {rb}")
+                self._rows[:0] = rows
+                self._trim()
+                self._has_rows.set()
+                return False
+            self.rows_written += len(rows)
+            self.batches_written += 1
+            return True
+
+    async def close(self):
+        """Stop the background task and write whatever is still queued."""
+        task, self._task = self._task, None
+        if task is not None:
+            # never cancel in the middle of a write
+            async with self._lock:
+                task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
@@ -0,0 +1,160 @@
+# utils/modlog_queries.py
+#
+# moderation_logs queries shared by the bot (aiosqlite) and the dashboard
+# (sqlite3). Pages are keyset-paginated on id, so page N costs the same as
+# page 1, and every filter is covered by an index on (guild_id, <column>)
+# (created by the migrations in utils/storage.py).
+
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import aiosqlite
+
+COLUMNS = "id, user_id, actor_id, action, reason, created_at"
+
+
+@dataclass
+class LogFilter:
+    user_id: Optional[int] = None
+    actor_id: Optional[int] = None
+    action: Optional[str] = None
+    since: Optional[int] = None  # unix seconds, inclusive
+    until: Optional[int] = None  # unix seconds, exclusive
+
+    def describe(self) -> str:
+        parts = []
+        if self.user_id:
+            parts.append(f"target={self.user_id}")
+        if self.actor_id:
+            parts.append(f"by={self.actor_id}")
+        if self.action:
+            parts.append(f"action={self.action}")
+        if self.since:
+            parts.append(f"since={time.strftime('%Y-%m-%d %H:%M', time.localtime(self.since))}")
+        if self.until:
+            parts.append(f"until={time.strftime('%Y-%m-%d %H:%M', time.localtime(self.until))}")
+        return ", ".join(parts)
+
+
+@dataclass
+class LogEntry:
+    id: int
+    user_id: Optional[int]
+    actor_id: Optional[int]
+    action: str
+    reason: str
+    created_at: int
+
+    def format(self) -> str:
+        ts = time.strftime("%Y-%m-%d %H:%M", time.localtime(self.created_at))
+        user_txt = self.user_id or "-"
+        reason_txt = self.reason or "-"
+        return f"[{ts}] action={self.action}, target={user_txt}, by={self.actor_id}, reason={reason_txt}"
+
+
+@dataclass
+class LogPage:
+    """Entries newest first, plus whether more exist on either side."""
+
+    entries: list[LogEntry] = field(default_factory=list)
+    has_newer: bool = False
+    has_older: bool = False
+
+    @property
+    def newest_id(self) -> Optional[int]:
+        return self.entries[0].id if self.entries else None
+
+    @property
+    def oldest_id(self) -> Optional[int]:
+        return self.entries[-1].id if self.entries else None
+
+
+def build_page_query(
+    guild_id: int,
+    filt: LogFilter,
+    limit: int,
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+) -> tuple[str, list]:
+    """
+    SQL for one page. `before_id` walks to older entries, `after_id` to
+    newer ones; one extra row is fetched to tell whether the walk can go on.
+    """
+    where = ["guild_id = ?"]
+    params: list = [guild_id]
+    for column, value in (("user_id", filt.user_id), ("actor_id", filt.actor_id), ("action", filt.action)):
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+    if filt.since is not None:
+        where.append("created_at >= ?")
+        params.append(filt.since)
+    if filt.until is not None:
+        where.append("created_at < ?")
+        params.append(filt.until)
+
+    if after_id is not None:
+        where.append("id > ?")
+        params.append(after_id)
+        order = "ASC"
+    else:
+        if before_id is not None:
+            where.append("id < ?")
+            params.append(before_id)
+        order = "DESC"
+
+    sql = f"SELECT {COLUMNS} FROM moderation_logs WHERE {' AND '.join(where)} ORDER BY id {order} LIMIT ?"
+    params.append(limit + 1)
+    return sql, params
+
+
+def _to_page(rows, limit: int, before_id: Optional[int], after_id: Optional[int]) -> LogPage:
+    more = len(rows) > limit
+    entries = [LogEntry(*row) for row in rows[:limit]]
+    if after_id is not None:
+        entries.reverse()
+        return LogPage(entries, has_newer=more, has_older=True)
+    return LogPage(entries, has_newer=before_id is not None, has_older=more)
+
+
+async def fetch_page(
+    db: aiosqlite.Connection,
+    guild_id: int,
+    filt: LogFilter,
+    limit: int,
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+) -> LogPage:
+    sql, params = build_page_query(guild_id, filt, limit, before_id, after_id)
+    cur = await db.execute(sql, params)
+    return _to_page(await cur.fetchall(), limit, before_id, after_id)
+
+
+def fetch_page_sync(
+    conn: sqlite3.Connection,
+    guild_id: int,
+    filt: LogFilter,
+    limit: int,
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+) -> LogPage:
+    sql, params = build_page_query(guild_id, filt, limit, before_id, after_id)
+    rows = [tuple(r) for r in conn.execute(sql, params).fetchall()]
+    return _to_page(rows, limit, before_id, after_id)
+
+
+# ---------- daily rollup ----------
+
+def daily_counts_sync(conn: sqlite3.Connection, guild_id: int) -> list[tuple[str, str, int]]:
+    """(day, action, count) rows from the rollup, oldest day first."""
+    cur = conn.execute(
+        """
+        SELECT day, action, count FROM moderation_daily_counts
+        WHERE guild_id = ?
+        ORDER BY day
+        """,
+        (guild_id,),
+    )
+    return [tuple(r) for r in cur.fetchall()]
@@ -0,0 +1,131 @@
+# utils/offload.py
+
+import asyncio
+import hashlib
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Any, Callable, Optional, Tuple
+
+
+# ---------- worker functions (run inside the pool) ----------
+
+@lru_cache(maxsize=8)
+def _compile_patterns(patterns: Tuple[str, ...]) -> list[re.Pattern]:
+    return [re.compile(p, re.IGNORECASE) for p in patterns]
+
+
+def match_patterns(patterns: Tuple[str, ...], text: str) -> Optional[str]:
+    """Return the first pattern that matches `text` (compiled once per worker)."""
+    for rx in _compile_patterns(patterns):
+        if rx.search(text):
+            return rx.pattern
+    return None
+
+
+# ---------- thread helpers ----------
+
+def sha256_hex(data: bytes) -> str:
+    # hashlib drops the GIL on large buffers, so a thread is enough and
+    # the bytes are never pickled over to a worker process
+    return hashlib.sha256(data).hexdigest()
+
+
+# ---------- pool ----------
+
+class OffloadPool:
+    """
+    Process pool for CPU-heavy checks.
+
+    `run()` never blocks the caller for long: if `max_pending` jobs are
+    already queued it refuses straight away, and a job that takes longer
+    than `timeout` is abandoned. Both return (False, None) so the caller
+    can fall back to its cheap checks.
+
+    An abandoned job would keep its worker busy (a catastrophic regex
+    never returns), so a timeout terminates the workers and the next job
+    starts a fresh pool. Workers are started with forkserver/spawn, never
+    forked from the bot with its gateway and database threads.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 64, timeout: float = 2.0):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+        # counters
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.recycled = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            methods = multiprocessing.get_all_start_methods()
+            ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx)
+        return self._executor
+
+    def _recycle(self, executor: Optional[ProcessPoolExecutor]):
+        """Kill `executor`'s workers (running jobs included) and drop it."""
+        if executor is None:
+            return
+        if self._executor is executor:
+            self._executor = None
+        # shutdown() alone waits for running jobs; there is no public way
+        # to stop them before Python 3.14's terminate_workers()
+        for proc in list((getattr(executor, "_processes", None) or {}).values()):
+            proc.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _done(self, _):
+        self.pending -= 1
+
+    async def run(self, fn: Callable[..., Any], *args) -> Tuple[bool, Any]:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return False, None
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            cf = executor.submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError) as e:
+            print(f"[OFFLOAD] Pool unavailable, restarting: {e}")
+            self._recycle(executor)
+            self.errors += 1
+            return False, None
+
+        # `pending` counts until the worker is really done, even after a timeout
+        self.pending += 1
+        cf.add_done_callback(lambda f: loop.call_soon_threadsafe(self._done, f))
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(cf), self.timeout)
+        except asyncio.TimeoutError:
+            # jobs still in flight fail with BrokenProcessPool and fall back
+            self.timeouts += 1
+            if self._executor is executor:
+                self.recycled += 1
+                print(f"[OFFLOAD] Job {getattr(fn, '__name__', fn)} timed out, restarting pool")
+                self._recycle(executor)
+            return False, None
+        except Exception as e:
+            print(f"[OFFLOAD] Job {getattr(fn, '__name__', fn)} failed: {e}")
+            self.errors += 1
+            return False, None
+        self.completed += 1
+        return True, result
+
+    def shutdown(self):
+        self._recycle(self._executor)
+
+    def summary(self) -> str:
+        return (
+            f"{self.completed} done, {self.pending} pending, {self.rejected} rejected "
+            f"(saturated), {self.timeouts} timed out, {self.errors} errors, "
+            f"{self.recycled} restarts"
+        )
@@ -0,0 +1,103 @@
+# utils/permissions.py
+
+from typing import Dict, Iterable
+
+import discord
+from discord.ext import commands
+from discord import app_commands
+
+from config import ADMIN_ROLE_IDS
+
+
+class PermissionService:
+    """
+    Shared staff/admin resolution for all cogs.
+
+    Per guild it keeps a frozenset of staff role ids (ADMIN_ROLE_IDS plus
+    any role with Administrator) and a member_id -> bool cache. Role and
+    member update events drop the affected entries.
+    """
+
+    def __init__(self, admin_role_ids: Iterable[int] = ADMIN_ROLE_IDS, max_members: int = 100_000):
+        self.admin_role_ids = frozenset(admin_role_ids)
+        self.max_members = max_members
+        self._staff_roles: Dict[int, frozenset[int]] = {}
+        self._members: Dict[int, Dict[int, bool]] = {}
+
+    def staff_roles(self, guild: discord.Guild) -> frozenset[int]:
+        roles = self._staff_roles.get(guild.id)
+        if roles is None:
+            roles = frozenset(
+                r.id
+                for r in guild.roles
+                if r.id in self.admin_role_ids or r.permissions.administrator
+            )
+            self._staff_roles[guild.id] = roles
+        return roles
+
+    def is_staff(self, member: discord.Member) -> bool:
+        guild = member.guild
+        cache = self._members.get(guild.id)
+        if cache is None:
+            cache = self._members[guild.id] = {}
+        staff = cache.get(member.id)
+        if staff is None:
+            if len(cache) >= self.max_members:
+                cache.clear()
+            roles = self.staff_roles(guild)
+            staff = member.id == guild.owner_id or any(r.id in roles for r in member.roles)
+            cache[member.id] = staff
+        return staff
+
+    def invalidate_guild(self, guild_id: int):
+        self._staff_roles.pop(guild_id, None)
+        self._members.pop(guild_id, None)
+
+    def invalidate_member(self, guild_id: int, member_id: int):
+        cache = self._members.get(guild_id)
+        if cache is not None:
+            cache.pop(member_id, None)
+
+    # ---------- cache invalidation listeners ----------
+
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.roles != after.roles:
+            self.invalidate_member(after.guild.id, after.id)
+
+    async def on_member_remove(self, member: discord.Member):
+        self.invalidate_member(member.guild.id, member.id)
+
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        self.invalidate_guild(after.guild.id)
+
+    async def on_guild_role_create(self, role: discord.Role):
+        self.invalidate_guild(role.guild.id)
+
+    async def on_guild_role_delete(self, role: discord.Role):
+        self.invalidate_guild(role.guild.id)
+
+    async def on_guild_update(self, before: discord.Guild, after: discord.Guild):
+        if before.owner_id != after.owner_id:
+            self.invalidate_guild(after.id)
+
+    def attach(self, bot: commands.Bot):
+        for listener in (
+            self.on_member_update,
+            self.on_member_remove,
+            self.on_guild_role_update,
+            self.on_guild_role_create,
+            self.on_guild_role_delete,
+            self.on_guild_update,
+        ):
+            bot.add_listener(listener)
+
+
+def is_admin(denied_message: str = "❌ Admin only."):
+    async def predicate(interaction: discord.Interaction):
+        member = interaction.user
+        if isinstance(member, discord.Member) and interaction.client.perms.is_staff(member):  # type: ignore
+            return True
+        await interaction.response.send_message(denied_message, ephemeral=True)
+        raise app_commands.CheckFailure("Not admin")
+
+    return app_commands.check(predicate)
@@ -0,0 +1,163 @@
+# utils/purge.py
+
+import asyncio
+import datetime
+import re
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+import discord
+
+BULK_MAX = 100
+# Discord only bulk-deletes messages younger than 14 days; keep a margin
+BULK_MAX_AGE = datetime.timedelta(days=14) - datetime.timedelta(minutes=5)
+
+
+@dataclass
+class PurgeFilter:
+    author_id: Optional[int] = None
+    pattern: Optional[re.Pattern] = None
+    after: Optional[datetime.datetime] = None
+    before: Optional[datetime.datetime] = None
+    attachments_only: bool = False
+    bots_only: bool = False
+
+    def matches(self, message: discord.Message) -> bool:
+        if message.pinned:
+            return False
+        if self.author_id is not None and message.author.id != self.author_id:
+            return False
+        if self.bots_only and not message.author.bot:
+            return False
+        if self.attachments_only and not message.attachments:
+            return False
+        if self.pattern is not None and not self.pattern.search(message.content):
+            return False
+        return True
+
+
+@dataclass
+class PurgeReport:
+    scanned: int = 0
+    matched: int = 0
+    deleted: int = 0
+    bulk_batches: int = 0
+    single: int = 0
+    failed: int = 0
+    channels: int = 0
+    no_access: int = 0
+    duration: float = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"deleted {self.deleted}/{self.matched} matching of {self.scanned} scanned "
+            f"in {self.channels} channel(s), {self.duration:.0f}s "
+            f"({self.bulk_batches} bulk batches, {self.single} single, {self.failed} failed"
+            + (f", {self.no_access} channel(s) without access" if self.no_access else "")
+            + ")"
+        )
+
+
+# progress(report) – called after each batch
+PurgeProgress = Callable[[PurgeReport], Awaitable[None]]
+
+
+async def _delete_bulk(channel: discord.TextChannel, batch: list[discord.Message], report: PurgeReport):
+    try:
+        if len(batch) == 1:
+            await batch[0].delete()
+        else:
+            await channel.delete_messages(batch, reason="Purge")
+            report.bulk_batches += 1
+        report.deleted += len(batch)
+    except discord.NotFound:
+        # someone else got there first; bulk delete is all-or-nothing, so retry singly
+        for message in batch:
+            try:
+                await message.delete()
+                report.deleted += 1
+            except discord.NotFound:
+                pass
+            except discord.HTTPException:
+                report.failed += 1
+    except discord.HTTPException:
+        report.failed += len(batch)
+
+
+async def purge_channel(
+    channel: discord.TextChannel,
+    filt: PurgeFilter,
+    limit: int,
+    report: PurgeReport,
+    scan_limit: int,
+    single_delay: float = 1.0,
+    progress: Optional[PurgeProgress] = None,
+):
+    """
+    Delete up to `limit` (in total across calls sharing `report`) messages
+    matching `filt`, newest first.
+
+    History is streamed page by page and only the current batch is kept:
+    recent messages go out in bulk deletes of up to 100, messages past the
+    14-day bulk window are deleted one by one, `single_delay` apart.
+    """
+    report.channels += 1
+    cutoff = discord.utils.utcnow() - BULK_MAX_AGE
+    batch: list[discord.Message] = []
+
+    async for message in channel.history(limit=scan_limit, before=filt.before, after=filt.after, oldest_first=False):
+        report.scanned += 1
+        if not filt.matches(message):
+            continue
+        report.matched += 1
+
+        if message.created_at > cutoff:
+            batch.append(message)
+            if len(batch) >= BULK_MAX:
+                await _delete_bulk(channel, batch, report)
+                batch = []
+                if progress is not None:
+                    await progress(report)
+        else:
+            try:
+                await message.delete()
+                report.deleted += 1
+                report.single += 1
+            except discord.NotFound:
+                pass
+            except discord.HTTPException:
+                report.failed += 1
+            if progress is not None:
+                await progress(report)
+            await asyncio.sleep(single_delay)
+
+        if report.matched >= limit:
+            break
+
+    if batch:
+        await _delete_bulk(channel, batch, report)
+        if progress is not None:
+            await progress(report)
+
+
+async def purge(
+    channels: list[discord.TextChannel],
+    filt: PurgeFilter,
+    limit: int,
+    scan_limit: int,
+    single_delay: float = 1.0,
+    progress: Optional[PurgeProgress] = None,
+) -> PurgeReport:
+    """Run purge_channel over channels in turn until `limit` messages matched."""
+    report = PurgeReport()
+    started = time.monotonic()
+    for channel in channels:
+        if report.matched >= limit:
+            break
+        try:
+            await purge_channel(channel, filt, limit, report, scan_limit, single_delay, progress)
+        except discord.Forbidden:
+            report.no_access += 1
+    report.duration = time.monotonic() - started
+    return report
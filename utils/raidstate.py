@@ -0,0 +1,78 @@
+# utils/raidstate.py
+
+from collections import deque
+from typing import Dict, Optional
+
+from config import (
+    RAID_JOIN_WINDOW,
+    RAID_JOIN_THRESHOLD,
+    LOCKDOWN_HARD_THRESHOLD,
+    FIREWALL_AUTO_RELEASE_MINUTES,
+    RAID_GUILD_OVERRIDES,
+)
+
+
+class JoinCounter:
+    """Sliding-window join counter; each timestamp is added and dropped once."""
+
+    def __init__(self, window: float):
+        self.window = window
+        self._times: deque[float] = deque()
+
+    def _expire(self, now: float):
+        cutoff = now - self.window
+        times = self._times
+        while times and times[0] < cutoff:
+            times.popleft()
+
+    def hit(self, now: float) -> int:
+        self._times.append(now)
+        self._expire(now)
+        return len(self._times)
+
+    def count(self, now: float) -> int:
+        self._expire(now)
+        return len(self._times)
+
+
+class GuildRaidState:
+    """Raid detection and firewall state for one guild."""
+
+    def __init__(self, guild_id: int):
+        opts = RAID_GUILD_OVERRIDES.get(guild_id, {})
+        self.join_window: int = opts.get("join_window", RAID_JOIN_WINDOW)
+        self.join_threshold: int = opts.get("join_threshold", RAID_JOIN_THRESHOLD)
+        self.lockdown_threshold: int = opts.get("lockdown_threshold", LOCKDOWN_HARD_THRESHOLD)
+        self.auto_release_minutes: int = opts.get(
+            "auto_release_minutes", FIREWALL_AUTO_RELEASE_MINUTES
+        )
+        self.joins = JoinCounter(self.join_window)
+        self.firewall_enabled = False
+        self.last_raid_time = 0.0
+
+    def joins_per_minute(self, now: float) -> float:
+        return self.joins.count(now) * 60 / self.join_window
+
+    def should_release(self, now: float) -> bool:
+        if not self.firewall_enabled or self.auto_release_minutes <= 0:
+            return False
+        return now - self.last_raid_time > self.auto_release_minutes * 60
+
+
+class RaidStates:
+    """Lazily created GuildRaidState per guild id."""
+
+    def __init__(self):
+        self._states: Dict[int, GuildRaidState] = {}
+
+    def __getitem__(self, guild_id: int) -> GuildRaidState:
+        state = self._states.get(guild_id)
+        if state is None:
+            state = self._states[guild_id] = GuildRaidState(guild_id)
+        return state
+
+    def get(self, guild_id: int) -> Optional[GuildRaidState]:
+        return self._states.get(guild_id)
+
+    def items(self):
+        return self._states.items()
@@ -0,0 +1,135 @@
+# utils/rules.py
+
+import bisect
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional
+
+import discord
+
+# latency histogram bucket upper bounds, in microseconds
+LATENCY_BUCKETS_US = (5, 10, 25, 50, 100, 250, 500, 1_000, 2_500, 5_000, 10_000, 50_000)
+
+
+@dataclass
+class Verdict:
+    action: str                   # moderation_logs action, e.g. "badword_delete"
+    log_text: str                 # log channel line
+    delete: bool = True           # delete the triggering message
+    mute: bool = False            # deny send_messages in the channel
+    reason: str = ""
+    # (channel_id, message_id) of earlier messages to remove as well
+    extra_deletes: list[tuple[int, int]] = field(default_factory=list)
+
+
+class Rule:
+    """
+    One auto-mod check. `cost` is a rough relative price; rules run in
+    ascending cost order and the first verdict wins.
+    """
+
+    name = "rule"
+    cost = 100
+
+    async def check(self, message: discord.Message) -> Optional[Verdict]:
+        raise NotImplementedError
+
+
+class LatencyHistogram:
+    def __init__(self, bounds: Iterable[int] = LATENCY_BUCKETS_US):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total_us = 0.0
+        self.count = 0
+
+    def record(self, us: float):
+        self.counts[bisect.bisect_left(self.bounds, us)] += 1
+        self.total_us += us
+        self.count += 1
+
+    @property
+    def mean_us(self) -> float:
+        return self.total_us / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th percentile (inf if beyond)."""
+        if not self.count:
+            return 0.0
+        target = p / 100 * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return float(self.bounds[i]) if i < len(self.bounds) else float("inf")
+        return float("inf")
+
+
+class RuleStats:
+    def __init__(self):
+        self.hits = 0
+        self.latency = LatencyHistogram()
+
+
+class RulePipeline:
+    """
+    Ordered set of rules with per-guild enablement and ordering.
+
+    `disabled` maps guild_id -> rule names to skip, `order` maps guild_id ->
+    rule names to run first (in that order); remaining rules follow by cost.
+    """
+
+    def __init__(
+        self,
+        disabled: Optional[Dict[int, set[str]]] = None,
+        order: Optional[Dict[int, list[str]]] = None,
+    ):
+        self.disabled = disabled or {}
+        self.order = order or {}
+        self.rules: Dict[str, Rule] = {}
+        self.stats: Dict[str, RuleStats] = {}
+        self._by_guild: Dict[int, list[Rule]] = {}
+
+    def register(self, rule: Rule):
+        self.rules[rule.name] = rule
+        self.stats.setdefault(rule.name, RuleStats())
+        self._by_guild.clear()
+
+    def rules_for(self, guild_id: int) -> list[Rule]:
+        rules = self._by_guild.get(guild_id)
+        if rules is None:
+            skip = self.disabled.get(guild_id, set())
+            pinned = [n for n in self.order.get(guild_id, []) if n in self.rules]
+            rest = sorted(
+                (r for n, r in self.rules.items() if n not in pinned),
+                key=lambda r: r.cost,
+            )
+            rules = [self.rules[n] for n in pinned] + rest
+            rules = [r for r in rules if r.name not in skip]
+            self._by_guild[guild_id] = rules
+        return rules
+
+    async def run(self, message: discord.Message) -> Optional[tuple[Rule, Verdict]]:
+        assert message.guild is not None
+        for rule in self.rules_for(message.guild.id):
+            stats = self.stats[rule.name]
+            started = time.perf_counter()
+            verdict = await rule.check(message)
+            stats.latency.record((time.perf_counter() - started) * 1e6)
+            if verdict is not None:
+                stats.hits += 1
+                return rule, verdict
+        return None
+
+    def report(self) -> list[str]:
+        """One line per rule, busiest first."""
+        total = sum(s.latency.total_us for s in self.stats.values()) or 1.0
+        lines = []
+        for name, s in sorted(
+            self.stats.items(), key=lambda kv: kv[1].latency.total_us, reverse=True
+        ):
+            h = s.latency
+            lines.append(
+                f"{name}: {h.count} runs, {s.hits} hits, mean {h.mean_us:.0f}µs, "
+                f"p99 ≤{h.percentile(99):g}µs, {h.total_us / total:.0%} of time"
+            )
+        return lines
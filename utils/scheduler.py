@@ -0,0 +1,87 @@
+# utils/scheduler.py
+
+import asyncio
+import heapq
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+
+class Scheduler:
+    """
+    Fires `fire(key)` when a key's run_at (unix seconds) is reached.
+
+    Pending keys sit in a min-heap; the runner sleeps until the earliest
+    one is due instead of polling, and `add()` wakes it so a new, sooner
+    entry is not missed. Keys already overdue when added (e.g. after
+    downtime) fire right away, once. Rescheduling a key just pushes a new
+    heap entry; stale ones are skipped when popped.
+    """
+
+    def __init__(self, fire: Callable[[Hashable], Awaitable[None]]):
+        self.fire = fire
+        self._heap: list[tuple[float, int, Hashable]] = []
+        self._due: Dict[Hashable, float] = {}
+        self._seq = 0  # tie-breaker so keys never get compared
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # counters
+        self.fired = 0
+        self.errors = 0
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    @property
+    def next_run(self) -> Optional[float]:
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def add(self, key: Hashable, run_at: float):
+        self._due[key] = run_at
+        self._seq += 1
+        heapq.heappush(self._heap, (run_at, self._seq, key))
+        self._wake.set()
+
+    def remove(self, key: Hashable):
+        self._due.pop(key, None)
+
+    def _drop_stale(self):
+        heap = self._heap
+        while heap and self._due.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
+
+    def start(self, before: Optional[Callable[[], Awaitable[None]]] = None):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(before))
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, before):
+        if before is not None:
+            await before()
+        while True:
+            self._wake.clear()
+            run_at = self.next_run
+            delay = None if run_at is None else run_at - time.time()
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, key = heapq.heappop(self._heap)
+            del self._due[key]
+            try:
+                await self.fire(key)
+                self.fired += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"[SCHEDULER] Job {key!r} failed: {e}")
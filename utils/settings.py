@@ -0,0 +1,143 @@
+# utils/settings.py
+
+import asyncio
+import sqlite3
+from typing import Dict, Optional
+
+import aiosqlite
+
+FIELDS = ("welcome_channel_id", "welcome_message", "autorole_id", "default_announce_id")
+
+SELECT_SQL = f"SELECT {', '.join(FIELDS)} FROM guild_settings WHERE guild_id = ?"
+
+UPSERT_SQL = f"""
+INSERT INTO guild_settings (guild_id, {', '.join(FIELDS)})
+VALUES (?, {', '.join('?' for _ in FIELDS)})
+ON CONFLICT(guild_id) DO UPDATE SET
+  {', '.join(f'{f} = excluded.{f}' for f in FIELDS)}
+"""
+
+
+class GuildSettingsCache:
+    """
+    Read-through / write-through cache of guild_settings rows.
+
+    Rows (and missing rows) are loaded on first use and then served from
+    memory. `upsert()` writes the row and updates the cache in place. Writes
+    from other processes (the dashboard) are picked up by polling
+    `PRAGMA data_version`, which only changes when another connection
+    commits; when it does, the whole cache is dropped and reloads lazily.
+    """
+
+    def __init__(self, db: aiosqlite.Connection, poll_seconds: float = 5.0):
+        self.db = db
+        self.poll_seconds = poll_seconds
+        self._rows: Dict[int, Optional[dict]] = {}
+        self._lock = asyncio.Lock()
+        self._data_version: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        # bumped by invalidate()/upsert(); a load that raced one of them is
+        # returned but not cached, so it cannot put a stale row back
+        self._generation = 0
+        # counters
+        self.hits = 0
+        self.loads = 0
+        self.invalidations = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _read_data_version(self) -> int:
+        cur = await self.db.execute("PRAGMA data_version")
+        row = await cur.fetchone()
+        return row[0]
+
+    async def _poll(self):
+        while True:
+            try:
+                version = await self._read_data_version()
+                if self._data_version is not None and version != self._data_version:
+                    self.invalidate()
+                self._data_version = version
+            except Exception as e:
+                print(f"[SETTINGS] data_version poll failed: {e}")
+            await asyncio.sleep(self.poll_seconds)
+
+    def invalidate(self, guild_id: Optional[int] = None):
+        """Drop one guild (or everything) so it is reloaded on next use."""
+        if guild_id is None:
+            self._rows.clear()
+        else:
+            self._rows.pop(guild_id, None)
+        self._generation += 1
+        self.invalidations += 1
+
+    async def _load(self, guild_id: int) -> Optional[dict]:
+        cur = await self.db.execute(SELECT_SQL, (guild_id,))
+        row = await cur.fetchone()
+        self.loads += 1
+        return dict(zip(FIELDS, row)) if row is not None else None
+
+    async def get(self, guild_id: int) -> Optional[dict]:
+        """Settings for a guild, or None if it has no row."""
+        if guild_id in self._rows:
+            self.hits += 1
+            row = self._rows[guild_id]
+        else:
+            generation = self._generation
+            row = await self._load(guild_id)
+            if generation == self._generation:
+                self._rows[guild_id] = row
+        return dict(row) if row is not None else None
+
+    async def upsert(self, guild_id: int, **changes) -> dict:
+        """Set the given (non-None) fields and return the full row."""
+        unknown = set(changes) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown guild setting(s): {', '.join(sorted(unknown))}")
+
+        async with self._lock:
+            current = await self.get(guild_id) or dict.fromkeys(FIELDS)
+            for key, value in changes.items():
+                if value is not None:
+                    current[key] = value
+            await self.db.execute(UPSERT_SQL, (guild_id, *(current[f] for f in FIELDS)))
+            await self.db.commit()
+            self._generation += 1
+            self._rows[guild_id] = current
+        return dict(current)
+
+
+# ---------- dashboard (sync sqlite3) ----------
+
+def get_settings_sync(conn: sqlite3.Connection, guild_id: int) -> Optional[dict]:
+    row = conn.execute(SELECT_SQL, (guild_id,)).fetchone()
+    return dict(zip(FIELDS, tuple(row))) if row is not None else None
+
+
+def set_settings_sync(conn: sqlite3.Connection, guild_id: int, **values):
+    """Set exactly the given fields (None clears one); others are kept."""
+    unknown = set(values) - set(FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown guild setting(s): {', '.join(sorted(unknown))}")
+    columns = list(values)
+    conn.execute(
+        f"""
+        INSERT INTO guild_settings (guild_id, {', '.join(columns)})
+        VALUES (?, {', '.join('?' for _ in columns)})
+        ON CONFLICT(guild_id) DO UPDATE SET
+          {', '.join(f'{c} = excluded.{c}' for c in columns)}
+        """,
+        (guild_id, *values.values()),
+    )
+    conn.commit()
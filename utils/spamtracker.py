@@ -0,0 +1,63 @@
+# utils/spamtracker.py
+
+import sys
+from collections import OrderedDict, deque
+
+
+class SpamTracker:
+    """
+    Sliding-window message counter per user.
+
+    Each user keeps at most `max_messages + 1` timestamps (a bounded deque),
+    users are kept in LRU order and the least recently active one is dropped
+    once `max_users` is reached. `sweep()` forgets users idle for a full window.
+    """
+
+    def __init__(self, window: float, max_messages: int, max_users: int = 50_000):
+        self.window = window
+        self.max_messages = max_messages
+        self.max_users = max_users
+        self._history: "OrderedDict[int, deque[float]]" = OrderedDict()
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._history)
+
+    def hit(self, user_id: int, now: float) -> int:
+        """Record a message and return how many fall inside the window."""
+        hist = self._history.get(user_id)
+        if hist is None:
+            if len(self._history) >= self.max_users:
+                self._history.popitem(last=False)
+                self.evicted += 1
+            hist = deque(maxlen=self.max_messages + 1)
+            self._history[user_id] = hist
+        else:
+            self._history.move_to_end(user_id)
+
+        hist.append(now)
+        cutoff = now - self.window
+        while hist and hist[0] < cutoff:
+            hist.popleft()
+        return len(hist)
+
+    def sweep(self, now: float) -> int:
+        """Drop users with no message in the last window; returns how many."""
+        cutoff = now - self.window
+        dropped = 0
+        # LRU order: oldest activity first, so stop at the first active user
+        while self._history:
+            user_id, hist = next(iter(self._history.items()))
+            if hist and hist[-1] >= cutoff:
+                break
+            del self._history[user_id]
+            dropped += 1
+        return dropped
+
+    def memory_estimate(self) -> int:
+        """Rough size in bytes of the tracked state."""
+        total = sys.getsizeof(self._history)
+        for hist in self._history.values():
+            # key int + deque + float entries
+            total += 28 + sys.getsizeof(hist) + 24 * len(hist)
+        return total
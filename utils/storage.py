@@ -0,0 +1,314 @@
+# utils/storage.py
+#
+# Opening the database and keeping its schema current.
+#
+# The bot and the dashboard share one SQLite file from two processes. WAL
+# mode lets dashboard readers work from a snapshot while the bot writes,
+# so neither blocks the other; busy_timeout covers the short moments two
+# writers meet. Schema changes are numbered migrations recorded in
+# schema_version. Every migration is idempotent, so databases created
+# before versioning existed simply replay them all once.
+
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Iterator, Optional, Union
+
+import aiosqlite
+
+from config import DB_BUSY_TIMEOUT_MS, DB_CACHE_SIZE_KB, DB_MMAP_SIZE
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",  # safe with WAL; fsync at checkpoints only
+    f"PRAGMA cache_size = -{DB_CACHE_SIZE_KB}",
+    f"PRAGMA mmap_size = {DB_MMAP_SIZE}",
+    f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}",
+    "PRAGMA temp_store = MEMORY",
+)
+
+
+async def open_db(path: str) -> aiosqlite.Connection:
+    db = await aiosqlite.connect(path)
+    for pragma in PRAGMAS:
+        await db.execute(pragma)
+    return db
+
+
+def connect_sync(path: str, readonly: bool = False) -> sqlite3.Connection:
+    """Plain sqlite3 connection for the dashboard process."""
+    if readonly:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    # journal_mode is stored in the file; the rest is per connection
+    for pragma in PRAGMAS[1:]:
+        conn.execute(pragma)
+    return conn
+
+
+class SyncPool:
+    """
+    Connections for a threaded sync app (the dashboard): up to `readers`
+    read-only connections reused across requests, and one writer that
+    requests take turns on. Connections are opened on first use, so a
+    missing database file is only touched once something asks for it.
+    """
+
+    def __init__(self, path: str, readers: int):
+        self.path = path
+        self.readers = max(1, readers)
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._write_lock = threading.Lock()
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_open = self._opened < self.readers
+            if can_open:
+                self._opened += 1
+        if not can_open:
+            return self._idle.get()
+        try:
+            return connect_sync(self.path, readonly=True)
+        except Exception:
+            with self._lock:
+                self._opened -= 1
+            raise
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            # end any read transaction so the next user sees fresh data
+            conn.rollback()
+            self._idle.put(conn)
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = connect_sync(self.path)
+            try:
+                yield self._writer
+            except Exception:
+                self._writer.rollback()
+                raise
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._opened = 0
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+# ---------- migrations ----------
+
+Step = Union[str, Callable[[aiosqlite.Connection], Awaitable[None]]]
+
+
+async def add_column(db: aiosqlite.Connection, table: str, column: str, decl: str):
+    cur = await db.execute(f"PRAGMA table_info({table})")
+    if column not in {row[1] for row in await cur.fetchall()}:
+        await db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+async def _add_interval_column(db: aiosqlite.Connection):
+    await add_column(db, "scheduled_announcements", "interval_seconds", "INTEGER DEFAULT 0")
+
+
+MIGRATIONS: list[tuple[int, str, list[Step]]] = [
+    (1, "baseline tables", [
+        """
+        CREATE TABLE IF NOT EXISTS guild_settings (
+            guild_id            INTEGER PRIMARY KEY,
+            welcome_channel_id  INTEGER,
+            welcome_message     TEXT,
+            autorole_id         INTEGER,
+            default_announce_id INTEGER
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS scheduled_announcements (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id    INTEGER,
+            channel_id  INTEGER,
+            message     TEXT,
+            run_at      INTEGER,
+            sent        INTEGER DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS moderation_logs (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id    INTEGER,
+            user_id     INTEGER,
+            actor_id    INTEGER,
+            action      TEXT,
+            reason      TEXT,
+            created_at  INTEGER
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS tickets (
+            id              INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id        INTEGER,
+            channel_id      INTEGER,
+            opener_id       INTEGER,
+            status          TEXT,
+            created_at      INTEGER,
+            closed_at       INTEGER
+        )
+        """,
+    ]),
+    (2, "lockdown snapshots and pending captchas", [
+        """
+        CREATE TABLE IF NOT EXISTS lockdown_snapshots (
+            guild_id    INTEGER,
+            channel_id  INTEGER,
+            allow       INTEGER,
+            deny        INTEGER,
+            existed     INTEGER,
+            created_at  INTEGER,
+            PRIMARY KEY (guild_id, channel_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS pending_captchas (
+            guild_id    INTEGER,
+            user_id     INTEGER,
+            code        TEXT,
+            options     TEXT,
+            channel_id  INTEGER,
+            message_id  INTEGER,
+            created_at  INTEGER,
+            expires_at  INTEGER,
+            PRIMARY KEY (guild_id, user_id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_pending_captchas_expires ON pending_captchas (expires_at)",
+    ]),
+    (3, "recurring, multi-target announcements", [
+        _add_interval_column,
+        # only pending rows are indexed, so lookups stay small however much
+        # sent history accumulates
+        """
+        CREATE INDEX IF NOT EXISTS idx_scheduled_pending
+            ON scheduled_announcements (run_at) WHERE sent = 0
+        """,
+        # delivery state per channel for the occurrence due at run_at
+        """
+        CREATE TABLE IF NOT EXISTS announcement_targets (
+            announcement_id INTEGER,
+            guild_id        INTEGER,
+            channel_id      INTEGER,
+            run_at          INTEGER DEFAULT 0,
+            status          TEXT DEFAULT 'pending',
+            attempts        INTEGER DEFAULT 0,
+            error           TEXT,
+            updated_at      INTEGER,
+            PRIMARY KEY (announcement_id, channel_id)
+        )
+        """,
+    ]),
+    (4, "moderation log indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_modlog_guild_user ON moderation_logs (guild_id, user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_modlog_guild_actor ON moderation_logs (guild_id, actor_id)",
+        "CREATE INDEX IF NOT EXISTS idx_modlog_guild_action ON moderation_logs (guild_id, action)",
+        "CREATE INDEX IF NOT EXISTS idx_modlog_guild_created ON moderation_logs (guild_id, created_at)",
+    ]),
+    (5, "daily moderation rollup", [
+        """
+        CREATE TABLE IF NOT EXISTS moderation_daily_counts (
+            guild_id  INTEGER,
+            day       TEXT,      -- UTC date, YYYY-MM-DD
+            action    TEXT,
+            count     INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, day, action)
+        ) WITHOUT ROWID
+        """,
+        # recount from scratch in the same transaction that (re)creates the
+        # trigger, so no row is counted twice or missed
+        "DROP TRIGGER IF EXISTS trg_moderation_daily_counts",
+        "DELETE FROM moderation_daily_counts",
+        """
+        INSERT INTO moderation_daily_counts (guild_id, day, action, count)
+        SELECT guild_id, date(created_at, 'unixepoch'), action, COUNT(*)
+        FROM moderation_logs
+        GROUP BY 1, 2, 3
+        """,
+        """
+        CREATE TRIGGER trg_moderation_daily_counts
+        AFTER INSERT ON moderation_logs
+        BEGIN
+            INSERT INTO moderation_daily_counts (guild_id, day, action, count)
+            VALUES (NEW.guild_id, date(NEW.created_at, 'unixepoch'), NEW.action, 1)
+            ON CONFLICT (guild_id, day, action) DO UPDATE SET count = count + 1;
+        END
+        """,
+    ]),
+    (6, "unfiltered moderation log pages", [
+        # serves ORDER BY id for a guild without sorting its whole history
+        "CREATE INDEX IF NOT EXISTS idx_modlog_guild_id ON moderation_logs (guild_id, id)",
+    ]),
+]
+
+
+async def schema_version(db: aiosqlite.Connection) -> int:
+    await db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version     INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at  INTEGER
+        )
+        """
+    )
+    await db.commit()
+    cur = await db.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    row = await cur.fetchone()
+    return row[0]
+
+
+async def migrate(db: aiosqlite.Connection) -> list[int]:
+    """Apply pending migrations, each in its own transaction. Returns the versions applied."""
+    current = await schema_version(db)
+    applied = []
+    for version, description, steps in MIGRATIONS:
+        if version <= current:
+            continue
+        await db.execute("BEGIN IMMEDIATE")
+        try:
+            for step in steps:
+                if isinstance(step, str):
+                    await db.execute(step)
+                else:
+                    await step(db)
+            await db.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (version, description, int(time.time())),
+            )
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        applied.append(version)
+    return applied
@@ -0,0 +1,172 @@
+# utils/welcome_dispatch.py
+
+import asyncio
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+import discord
+
+
+class _GuildWelcomes:
+    __slots__ = ("recent", "pending", "channel", "flush_task")
+
+    def __init__(self):
+        self.recent: deque[float] = deque()
+        self.pending: list[str] = []
+        self.channel: Optional[discord.abc.Messageable] = None
+        self.flush_task: Optional[asyncio.Task] = None
+
+
+class WelcomeDispatcher:
+    """
+    Adaptive sender for welcome messages and DMs.
+
+    While a guild sees fewer than `batch_rate` joins per `window` seconds,
+    each member gets their own welcome post. Above that, mentions are
+    collected and posted as one "Welcome @a, @b, …" message per window.
+
+    DMs go through a bounded low-priority queue drained at `dm_per_second`.
+    A DM is dropped if the queue is full or `is_paused(guild_id)` says the
+    guild is under attack (checked on enqueue and again before sending).
+    """
+
+    def __init__(
+        self,
+        batch_rate: int = 5,
+        window: float = 10.0,
+        max_mentions: int = 30,
+        dm_per_second: float = 1.0,
+        dm_queue_max: int = 500,
+        is_paused: Optional[Callable[[int], bool]] = None,
+    ):
+        self.batch_rate = batch_rate
+        self.window = window
+        self.max_mentions = max_mentions
+        self.dm_interval = 1.0 / dm_per_second if dm_per_second > 0 else 0.0
+        self.is_paused = is_paused or (lambda guild_id: False)
+        self._guilds: Dict[int, _GuildWelcomes] = {}
+        self._dms: asyncio.Queue = asyncio.Queue(maxsize=dm_queue_max)
+        self._tasks: set[asyncio.Task] = set()
+        self._dm_worker: Optional[asyncio.Task] = None
+        # counters
+        self.sent = 0
+        self.batches = 0
+        self.merged = 0
+        self.dms_sent = 0
+        self.dms_dropped = 0
+        self.dms_failed = 0
+
+    def start(self):
+        if self._dm_worker is None:
+            self._dm_worker = asyncio.create_task(self._run_dms())
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    @property
+    def dm_backlog(self) -> int:
+        return self._dms.qsize()
+
+    # ---------- channel welcomes ----------
+
+    def welcome(
+        self,
+        channel: discord.abc.Messageable,
+        member: discord.Member,
+        embed: discord.Embed,
+    ):
+        guild_id = member.guild.id
+        state = self._guilds.get(guild_id)
+        if state is None:
+            state = self._guilds[guild_id] = _GuildWelcomes()
+
+        now = time.monotonic()
+        state.recent.append(now)
+        while state.recent and now - state.recent[0] > self.window:
+            state.recent.popleft()
+
+        if not state.pending and len(state.recent) <= self.batch_rate:
+            self._spawn(self._send(channel, content=member.mention, embed=embed))
+            self.sent += 1
+            return
+
+        state.channel = channel
+        state.pending.append(member.mention)
+        if state.flush_task is None:
+            state.flush_task = self._spawn(self._flush_later(state))
+
+    async def _send(self, channel: discord.abc.Messageable, **kwargs):
+        try:
+            await channel.send(**kwargs)
+        except discord.HTTPException as e:
+            print(f"[WELCOME] Welcome post failed: {e}")
+
+    async def _flush_later(self, state: _GuildWelcomes):
+        await asyncio.sleep(self.window)
+        state.flush_task = None
+        await self._flush(state)
+
+    async def _flush(self, state: _GuildWelcomes):
+        mentions, state.pending = state.pending, []
+        if not mentions or state.channel is None:
+            return
+        text = "👋 Welcome " + ", ".join(mentions[: self.max_mentions])
+        if len(mentions) > self.max_mentions:
+            text += f" … and {len(mentions) - self.max_mentions} more"
+        self.batches += 1
+        self.merged += len(mentions)
+        await self._send(state.channel, content=text[:2000])
+
+    # ---------- DMs ----------
+
+    def dm(self, member: discord.Member, **kwargs):
+        if self.is_paused(member.guild.id):
+            self.dms_dropped += 1
+            return
+        try:
+            self._dms.put_nowait((member, kwargs))
+        except asyncio.QueueFull:
+            self.dms_dropped += 1
+
+    async def _run_dms(self):
+        while True:
+            member, kwargs = await self._dms.get()
+            if self.is_paused(member.guild.id):
+                self.dms_dropped += 1
+                continue
+            try:
+                await member.send(**kwargs)
+                self.dms_sent += 1
+            except discord.HTTPException:
+                # DMs closed or blocked
+                self.dms_failed += 1
+            if self.dm_interval:
+                await asyncio.sleep(self.dm_interval)
+
+    # ---------- lifecycle ----------
+
+    async def close(self):
+        """Post pending batches; queued DMs are low priority and dropped."""
+        if self._dm_worker is not None:
+            self._dm_worker.cancel()
+            self._dm_worker = None
+        self.dms_dropped += self._dms.qsize()
+        self._dms = asyncio.Queue(maxsize=self._dms.maxsize)
+        for state in self._guilds.values():
+            if state.flush_task is not None:
+                state.flush_task.cancel()
+                state.flush_task = None
+            await self._flush(state)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def summary(self) -> str:
+        return (
+            f"{self.sent} single, {self.merged} merged into {self.batches} posts; "
+            f"DMs {self.dms_sent} sent, {self.dms_dropped} dropped, "
+            f"{self.dms_failed} failed, {self.dm_backlog} queued"
+        )
@@ -0,0 +1,135 @@
+# utils/welcome_render.py
+
+import datetime
+from string import Formatter
+from typing import Optional
+
+import discord
+
+DEFAULT_TEMPLATE = (
+    "{mention}, welcome to **{server}**.\n"
+    "You are now entering a monitored cyber operations zone."
+)
+
+# Placeholders a welcome template may use. Anything else in braces is left
+# as written, so templates can never reach attributes ({member.guild...}).
+PLACEHOLDERS = ("mention", "name", "server", "member_count", "account_age")
+
+
+def format_age(created_at: datetime.datetime, now: Optional[datetime.datetime] = None) -> str:
+    now = now or discord.utils.utcnow()
+    days = max(0, (now - created_at).days)
+    if days >= 365:
+        years = days // 365
+        return f"{years} year{'s' if years != 1 else ''}"
+    if days >= 1:
+        return f"{days} day{'s' if days != 1 else ''}"
+    return "less than a day"
+
+
+class WelcomeTemplate:
+    """
+    A welcome template parsed once into literal text and placeholder slots.
+    Raises ValueError for malformed braces.
+    """
+
+    __slots__ = ("source", "parts", "fields")
+
+    def __init__(self, source: str):
+        self.source = source
+        # even indexes are literal text, odd indexes placeholder names
+        self.parts: list[str] = []
+        literal = ""
+        for text, field, spec, conversion in Formatter().parse(source):
+            literal += text
+            if field is None:
+                continue
+            if field in PLACEHOLDERS and not spec and not conversion:
+                self.parts.append(literal)
+                self.parts.append(field)
+                literal = ""
+            else:
+                # not a supported placeholder: keep it verbatim
+                literal += "{" + field + ("!" + conversion if conversion else "") + (":" + spec if spec else "") + "}"
+        self.parts.append(literal)
+        self.fields = frozenset(self.parts[1::2])
+
+    def render(self, values: dict) -> str:
+        out = self.parts[:]
+        for i in range(1, len(out), 2):
+            out[i] = str(values[out[i]])
+        return "".join(out)
+
+
+class WelcomeRenderer:
+    """
+    Everything about a guild's welcome message that does not depend on the
+    member: the compiled template, the embed skeleton (title, colour,
+    briefing / verification fields, guild icon) and the DM link view.
+    `key` identifies the inputs so callers can tell when to rebuild.
+    """
+
+    def __init__(
+        self,
+        guild: discord.Guild,
+        template: str,
+        rules_channel: Optional[discord.abc.GuildChannel],
+        verification_channel: Optional[discord.abc.GuildChannel],
+    ):
+        self.key = self.make_key(guild, template, rules_channel, verification_channel)
+        self.template = WelcomeTemplate(template)
+
+        embed = discord.Embed(title="🚨 New Operative Connected", color=discord.Color.red())
+        if rules_channel:
+            embed.add_field(
+                name="📜 Briefing",
+                value=f"Read {rules_channel.mention} before starting any operation.",
+                inline=False,
+            )
+        if verification_channel:
+            embed.add_field(
+                name="🧩 Verification",
+                value=f"Complete verification in {verification_channel.mention} to unlock the server.",
+                inline=False,
+            )
+        self.skeleton = embed
+        self.guild_icon_url = guild.icon.url if guild.icon else None
+
+        # link buttons have no callbacks, so one view can be sent many times
+        self.dm_view: Optional[discord.ui.View] = None
+        if verification_channel:
+            self.dm_view = discord.ui.View(timeout=None)
+            self.dm_view.add_item(
+                discord.ui.Button(
+                    label="Go to Verification Channel",
+                    url=f"https://discord.com/channels/{guild.id}/{verification_channel.id}",
+                    style=discord.ButtonStyle.link,
+                )
+            )
+
+    @staticmethod
+    def make_key(guild, template, rules_channel, verification_channel) -> tuple:
+        return (
+            template,
+            guild.icon.key if guild.icon else None,
+            rules_channel.id if rules_channel else None,
+            verification_channel.id if verification_channel else None,
+        )
+
+    def values(self, member: discord.Member) -> dict:
+        values = {"mention": member.mention, "name": member.display_name, "server": member.guild.name}
+        # only compute what the template actually uses
+        if "member_count" in self.template.fields:
+            values["member_count"] = member.guild.member_count or 0
+        if "account_age" in self.template.fields:
+            values["account_age"] = format_age(member.created_at)
+        return values
+
+    def embed_for(self, member: discord.Member) -> discord.Embed:
+        embed = self.skeleton.copy()
+        embed.description = self.template.render(self.values(member))
+        if member.avatar:
+            embed.set_thumbnail(url=member.avatar.url)
+        elif self.guild_icon_url:
+            embed.set_thumbnail(url=self.guild_icon_url)
+        return embed
@@ -0,0 +1,131 @@
+# utils/wordfilter.py
+
+import os
+from collections import deque
+from typing import Iterable, Optional
+
+from utils.listfiles import GuildListCache, ListFile
+
+# common character swaps used to dodge filters ("b4dw0rd" -> "badword")
+LEET_TABLE = str.maketrans(
+    {
+        "0": "o",
+        "1": "i",
+        "3": "e",
+        "4": "a",
+        "5": "s",
+        "7": "t",
+        "@": "a",
+        "$": "s",
+        "|": "l",
+        "+": "t",
+    }
+)
+
+
+def normalize(text: str) -> str:
+    return text.lower().translate(LEET_TABLE)
+
+
+def _is_boundary(text: str, index: int) -> bool:
+    return index < 0 or index >= len(text) or not text[index].isalnum()
+
+
+class WordMatcher:
+    """
+    Aho-Corasick automaton over a word list.
+
+    Built once, then `search()` walks the message a single time no matter
+    how many words are loaded, so cost only depends on message length.
+    """
+
+    def __init__(self, words: Iterable[str], word_boundary: bool = True):
+        self.word_boundary = word_boundary
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[tuple[int, ...]] = [()]
+
+        count = 0
+        for word in words:
+            word = normalize(word.strip())
+            if word:
+                self._insert(word)
+                count += 1
+        self.size = count
+        self._build_fail_links()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _insert(self, word: str):
+        state = 0
+        for ch in word:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+                self._goto[state][ch] = nxt
+            state = nxt
+        if len(word) not in self._out[state]:
+            self._out[state] += (len(word),)
+
+    def _build_fail_links(self):
+        goto, fail, out = self._goto, self._fail, self._out
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                # inherit matches that end at the fallback state
+                out[nxt] += tuple(n for n in out[fail[nxt]] if n not in out[nxt])
+
+    def search(self, text: str) -> Optional[str]:
+        """Return the first (normalized) word found in `text`, or None."""
+        if not self.size:
+            return None
+        text = normalize(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        boundary = self.word_boundary
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for length in out[state]:
+                    start = i - length + 1
+                    if not boundary or (
+                        _is_boundary(text, start - 1) and _is_boundary(text, i + 1)
+                    ):
+                        return text[start : i + 1]
+        return None
+
+
+class WordLists:
+    """
+    Bad-word lists from a directory laid out like GuildListCache's. As with
+    DomainLists, global.txt (plus `defaults`) becomes one shared automaton
+    and each guild's own file gets a small one, instead of every guild
+    rebuilding the whole global list into its own.
+    """
+
+    def __init__(self, root: str, defaults: Iterable[str] = (), word_boundary: bool = True):
+        def build(words: Iterable[str]) -> WordMatcher:
+            return WordMatcher(words, word_boundary=word_boundary)
+
+        self.shared: ListFile[WordMatcher] = ListFile(os.path.join(root, "global.txt"), build, defaults)
+        self.guilds: GuildListCache[WordMatcher] = GuildListCache(root, build, include_global=False)
+
+    def search(self, guild_id: int, text: str) -> Optional[str]:
+        return self.shared.get().search(text) or self.guilds.get(guild_id).search(text)
+
+    def reload_changed(self) -> list[str]:
+        """Names of the lists rebuilt ("global" or guild ids)."""
+        reloaded = ["global"] if self.shared.reload_changed() else []
+        return reloaded + [str(g) for g in self.guilds.reload_changed()]